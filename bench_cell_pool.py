@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+bench_cell_pool.py
+
+Usage:
+    python bench_cell_pool.py [--repeat N] [--scale N ...] [FILENAME]
+
+Measures what the CellPool of read_html_table.py saves while tables are
+held in memory. The given HTML file (default:
+grading/fixtures/project02_input.html) is repeated N times (default: 1,
+10 and 100) and parsed into TableHTMLParser.tables twice:
+
+    pooled    TableHTMLParser() as the CLI uses it
+    unpooled  TableHTMLParser(intern_cells=False), a new str for every cell
+
+The retained size is what tracemalloc still counts once the parse is
+over and the tables are the only thing kept; the parse time is the best
+of --repeat untraced runs. Both parses must produce the same tables.
+
+Only Python standard libraries are used (no external packages).
+"""
+
+import argparse
+import gc
+import os
+import time
+import tracemalloc
+
+from read_html_table import TableHTMLParser
+
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       "grading", "fixtures", "project02_input.html")
+
+
+def parse(text, intern_cells):
+    parser = TableHTMLParser(intern_cells=intern_cells)
+    parser.feed(text)
+    parser.close()
+    return parser.tables
+
+
+def retained_bytes(text, intern_cells):
+    """Bytes still allocated for the tables of text after the parser is gone, and the tables."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tables = parse(text, intern_cells)
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return retained, tables
+
+
+def best_time(text, intern_cells, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(text, intern_cells)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Measure the memory the CellPool saves on tables held in memory.")
+    ap.add_argument("source", nargs="?", default=FIXTURE, help="local HTML file")
+    ap.add_argument("--repeat", type=int, default=3, help="timed runs per measurement; the best is kept")
+    ap.add_argument("--scale", type=int, nargs="+", default=[1, 10, 100],
+                    help="how many copies of the page each input contains")
+    args = ap.parse_args()
+
+    with open(args.source, "r", encoding="utf-8", errors="replace") as f:
+        page = f.read()
+
+    print(f"{'scale':>6} {'MB':>7} {'rows':>8} {'pooled MB':>10} {'unpooled MB':>12} {'saved':>6} "
+          f"{'pooled s':>9} {'unpooled s':>11}")
+    for scale in args.scale:
+        text = page * scale
+        pooled, pooled_tables = retained_bytes(text, True)
+        unpooled, unpooled_tables = retained_bytes(text, False)
+        if pooled_tables != unpooled_tables:
+            raise SystemExit(f"scale {scale}: the pool changed the tables")
+        rows = sum(len(table) for table in pooled_tables)
+        del pooled_tables, unpooled_tables
+        pooled_s = best_time(text, True, args.repeat)
+        unpooled_s = best_time(text, False, args.repeat)
+        print(f"{scale:>6} {len(text.encode('utf-8')) / 1048576:>7.1f} {rows:>8} "
+              f"{pooled / 1048576:>10.2f} {unpooled / 1048576:>12.2f} {1 - pooled / unpooled:>6.0%} "
+              f"{pooled_s:>9.3f} {unpooled_s:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+bench_prescan.py
+
+Usage:
+    python bench_prescan.py [--repeat N] [--scale N ...] [FILENAME]
+
+Compares the two local-file paths of read_html_table.py:
+    full     decode the whole file and feed it to TableHTMLParser
+    prescan  mmap the file, locate the <table> regions with a byte-level
+             scan and decode/feed only those
+
+on the given HTML file (default: grading/fixtures/project02_input.html)
+and on synthetic versions made of that page repeated N times
+(default: 1 and 100). Both paths must produce the same tables.
+
+Only Python standard libraries are used (no external packages).
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from read_html_table import TableHTMLParser, load_html
+
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       "grading", "fixtures", "project02_input.html")
+
+
+def parse_file(path, prescan):
+    parser = TableHTMLParser()
+    parser.feed(load_html(path, prescan=prescan))
+    parser.close()
+    return parser.tables
+
+
+def best_time(path, prescan, repeat):
+    """Best wall time of repeat runs, and the tables of the last run."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tables = parse_file(path, prescan)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, tables
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark read_html_table.py --prescan against a full decode.")
+    ap.add_argument("source", nargs="?", default=FIXTURE, help="local HTML file")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best is kept")
+    ap.add_argument("--scale", type=int, nargs="+", default=[1, 100],
+                    help="how many copies of the page each synthetic input contains")
+    args = ap.parse_args()
+
+    with open(args.source, "rb") as f:
+        page = f.read()
+
+    print(f"{'scale':>6} {'MB':>8} {'full s':>9} {'prescan s':>10} {'full MB/s':>10} "
+          f"{'prescan MB/s':>13} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scale:
+            path = os.path.join(tmp, f"page_x{scale}.html")
+            with open(path, "wb") as f:
+                for _ in range(scale):
+                    f.write(page)
+            mb = os.path.getsize(path) / (1024 * 1024)
+
+            full, full_tables = best_time(path, False, args.repeat)
+            pre, pre_tables = best_time(path, True, args.repeat)
+            if full_tables != pre_tables:
+                raise SystemExit(f"scale {scale}: prescan produced different tables")
+            print(f"{scale:>6} {mb:>8.1f} {full:>9.3f} {pre:>10.3f} {mb / full:>10.1f} "
+                  f"{mb / pre:>13.1f} {full / pre:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+bench_read_html_table.py
+
+Usage:
+    python bench_read_html_table.py [--engines NAME ...] [--shapes SHAPE ...]
+                                    [--scales N ...] [--repeat N] [--prescan]
+                                    [--output FILE] [--compare OLD.json]
+
+Benchmarks the table extraction engines of read_html_table.py on synthetic
+pages scaled from 1x to 256x along one axis at a time:
+
+    tables    more tables        (4 x scale tables of 50 rows x 8 columns)
+    rows      longer tables      (4 tables of 50 x scale rows)
+    wide      wider rows         (4 tables of 8 x scale columns)
+    nested    deeper nesting     (a chain of scale tables, each inside a cell
+                                  of the one before)
+    entities  entity-heavy cells (scale character references per cell)
+    fixture   the grading/fixtures/project02_input.html page repeated scale times
+
+Every run is fetch-free and end to end: the page is read from a local
+file, parsed by the engine and written to CSV files in a temporary
+directory. For each engine, shape and scale the best wall time of
+--repeat runs is kept, and a separate run measures peak memory with
+tracemalloc. Throughput is reported in MB/s and rows/s.
+
+The results are written as JSON (default: bench_results_<timestamp>.json)
+together with the Python version and git commit, so that later runs can
+be compared with --compare.
+
+Only Python standard libraries are used (no external packages).
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from read_html_table import (DEFAULT_ENGINE, get_engine, iter_html_chunks, list_engines,
+                             write_tables_to_csv)
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE = os.path.join(HERE, "grading", "fixtures", "project02_input.html")
+SHAPES = ("tables", "rows", "wide", "nested", "entities", "fixture")
+DEFAULT_SCALES = (1, 4, 16, 64, 256)
+PRESCAN_SUFFIX = "+prescan"
+
+BASE_TABLES = 4
+BASE_ROWS = 50
+BASE_COLS = 8
+ENTITIES = ("&amp;", "&lt;", "&gt;", "&quot;", "&#160;", "&#x2013;", "&eacute;", "&nbsp;")
+WORDS = ("Yes", "No", "Application", "General", "1995", "Imperative", "", "Object-oriented")
+
+
+def _cell(r, c, tag="td"):
+    return f"<{tag}>{WORDS[(r * 7 + c) % len(WORDS)]} {r}.{c}</{tag}>"
+
+
+def _table(rows, cols, caption="", inner=""):
+    out = [f'<table class="wikitable"><caption>{caption}</caption>']
+    out.append("<tr>" + "".join(_cell(0, c, "th") for c in range(cols)) + "</tr>")
+    for r in range(1, rows):
+        cells = [_cell(r, c) for c in range(cols)]
+        if inner and r == 1:
+            cells[0] = f"<td>{inner}</td>"
+        out.append("<tr>" + "".join(cells) + "</tr>")
+    out.append("</table>")
+    return "\n".join(out)
+
+
+def _page(body):
+    return ("<!DOCTYPE html>\n<html><head><title>benchmark</title>"
+            "<style>td { padding: 1px }</style></head>\n<body>\n"
+            + body + "\n</body></html>\n")
+
+
+def generate_page(shape, scale):
+    """Return the synthetic page for shape at the given scale as a str."""
+    if shape == "tables":
+        return _page("\n".join(_table(BASE_ROWS, BASE_COLS, f"t{i}")
+                               for i in range(BASE_TABLES * scale)))
+    if shape == "rows":
+        return _page("\n".join(_table(BASE_ROWS * scale, BASE_COLS, f"t{i}")
+                               for i in range(BASE_TABLES)))
+    if shape == "wide":
+        return _page("\n".join(_table(BASE_ROWS, BASE_COLS * scale, f"t{i}")
+                               for i in range(BASE_TABLES)))
+    if shape == "nested":
+        inner = ""
+        for depth in range(scale):
+            inner = _table(BASE_ROWS // 5, BASE_COLS, f"depth {scale - depth}", inner)
+        return _page(inner)
+    if shape == "entities":
+        refs = "".join(ENTITIES[i % len(ENTITIES)] for i in range(scale))
+        body = []
+        for t in range(BASE_TABLES):
+            rows = ["<tr>" + "".join(f"<td>{refs}{r}.{c}</td>" for c in range(BASE_COLS)) + "</tr>"
+                    for r in range(BASE_ROWS)]
+            body.append("<table>\n" + "\n".join(rows) + "\n</table>")
+        return _page("\n".join(body))
+    if shape == "fixture":
+        with open(FIXTURE, "r", encoding="utf-8") as f:
+            return f.read() * scale
+    raise ValueError(f"unknown shape {shape!r}")
+
+
+def run_once(engine_name, path, out_dir):
+    """Extract every table of path with an engine; return (tables, rows, cells)."""
+    prescan = engine_name.endswith(PRESCAN_SUFFIX)
+    engine = get_engine(engine_name[:-len(PRESCAN_SUFFIX)] if prescan else engine_name)
+    counts = [0, 0]
+
+    def counted(tables):
+        for table in tables:
+            counts[0] += len(table)
+            counts[1] += sum(len(row) for row in table)
+            yield table
+
+    tables = write_tables_to_csv(counted(engine.parse(iter_html_chunks(path, prescan=prescan))),
+                                 out_dir, verbose=False)
+    return tables, counts[0], counts[1]
+
+
+def measure(engine_name, path, repeat):
+    """Best wall time of repeat runs plus a tracemalloc run; returns a result dict."""
+    best = None
+    with tempfile.TemporaryDirectory() as out_dir:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            tables, rows, cells = run_once(engine_name, path, out_dir)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        tracemalloc.start()
+        try:
+            run_once(engine_name, path, out_dir)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    size = os.path.getsize(path)
+    return {
+        "bytes": size,
+        "tables": tables,
+        "rows": rows,
+        "cells": cells,
+        "seconds": best,
+        "mb_per_s": size / (1024 * 1024) / best if best else None,
+        "rows_per_s": rows / best if best else None,
+        "peak_bytes": peak,
+    }
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=HERE, capture_output=True,
+                             text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, old_path):
+    """Print the speed ratio against an earlier results file."""
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = {(r["engine"], r["shape"], r["scale"]): r for r in json.load(f)["results"]}
+    print(f"\nCompared with {old_path} (time ratio new/old; < 1.00 is faster):")
+    for r in results:
+        before = old.get((r["engine"], r["shape"], r["scale"]))
+        if before and before["seconds"]:
+            print(f"  {r['engine']:24} {r['shape']:9} {r['scale']:>4}x  "
+                  f"{r['seconds'] / before['seconds']:.2f}  "
+                  f"peak {r['peak_bytes'] / max(before['peak_bytes'], 1):.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark read_html_table.py engines on scaled synthetic pages.")
+    ap.add_argument("--engines", nargs="+", default=None,
+                    help="engines to run (default: all registered engines)")
+    ap.add_argument("--shapes", nargs="+", default=list(SHAPES), choices=SHAPES,
+                    help="which axes to scale (default: all)")
+    ap.add_argument("--scales", nargs="+", type=int, default=list(DEFAULT_SCALES),
+                    help="scale factors (default: %(default)s)")
+    ap.add_argument("--repeat", type=int, default=3, help="timed runs per measurement; the best is kept")
+    ap.add_argument("--prescan", action="store_true",
+                    help=f"also run each engine with --prescan ({DEFAULT_ENGINE}{PRESCAN_SUFFIX}, ...)")
+    ap.add_argument("--output", default=None, help="JSON results file (default: bench_results_<timestamp>.json)")
+    ap.add_argument("--compare", metavar="OLD.json", help="compare with an earlier results file")
+    args = ap.parse_args()
+
+    engines = args.engines or [e.name for e in list_engines()]
+    if args.prescan:
+        engines += [name + PRESCAN_SUFFIX for name in engines]
+
+    results = []
+    print(f"{'engine':24} {'shape':9} {'scale':>5} {'MB':>7} {'rows':>8} {'s':>8} "
+          f"{'MB/s':>7} {'rows/s':>9} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for shape in args.shapes:
+            for scale in args.scales:
+                path = os.path.join(tmp, f"{shape}_x{scale}.html")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(generate_page(shape, scale))
+                for engine_name in engines:
+                    r = measure(engine_name, path, args.repeat)
+                    r.update(engine=engine_name, shape=shape, scale=scale)
+                    results.append(r)
+                    print(f"{engine_name:24} {shape:9} {scale:>5} {r['bytes'] / 1048576:>7.2f} "
+                          f"{r['rows']:>8} {r['seconds']:>8.3f} {r['mb_per_s']:>7.1f} "
+                          f"{r['rows_per_s']:>9.0f} {r['peak_bytes'] / 1048576:>8.1f}")
+                    sys.stdout.flush()
+                os.remove(path)
+
+    output = args.output or time.strftime("bench_results_%Y%m%d_%H%M%S.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "commit": git_commit(),
+            "repeat": args.repeat,
+            "results": results,
+        }, f, indent=2)
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+bench_serve_html_table.py
+
+Usage:
+    python bench_serve_html_table.py [--server URL | --workers N]
+                                     [--page FILENAME | --shape SHAPE --scale N]
+                                     [--requests N] [--concurrency N]
+                                     [--format json|csv] [--query PARAMS]
+                                     [--cli-runs N] [--output FILE]
+
+Load test for serve_html_table.py. --concurrency client threads, each
+on its own keep-alive connection, POST the page to /extract until
+--requests requests have been answered. The latency of every request is
+recorded and the report gives requests per second and the p50, p90, p99
+and maximum latency.
+
+Without --server a server with --workers processes is started in this
+process on a free port and stopped afterwards. The page is an HTML file
+(default: grading/fixtures/project02_input.html) or one of the synthetic
+pages of bench_read_html_table.py (--shape, --scale).
+
+--cli-runs N also times N runs of "python read_html_table.py" on the
+same page, the per-invocation cost that the server avoids.
+
+Only Python standard libraries are used (no external packages).
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+from bench_read_html_table import SHAPES, generate_page
+from serve_html_table import ExtractionServer
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE = os.path.join(HERE, "grading", "fixtures", "project02_input.html")
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile (q from 0 to 100) of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def load_test(server_url, page, requests, concurrency, path="/extract"):
+    """
+    POST page (bytes) to server_url + path from concurrency threads until
+    requests answers have come back. Returns (latencies in seconds,
+    errors, elapsed seconds).
+    """
+    parts = urlparse(server_url)
+    remaining = [requests]
+    lock = threading.Lock()
+    latencies = []
+    errors = []
+    headers = {"Content-Type": "text/html; charset=utf-8"}
+
+    def client():
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+        try:
+            while True:
+                with lock:
+                    if remaining[0] == 0:
+                        return
+                    remaining[0] -= 1
+                start = time.perf_counter()
+                try:
+                    conn.request("POST", path, page, headers)
+                    response = conn.getresponse()
+                    response.read()
+                except (OSError, http.client.HTTPException) as e:
+                    conn.close()
+                    with lock:
+                        errors.append(str(e))
+                    continue
+                elapsed = time.perf_counter() - start
+                with lock:
+                    if response.status == 200:
+                        latencies.append(elapsed)
+                    else:
+                        errors.append(f"HTTP {response.status}")
+                if response.will_close:
+                    conn.close()
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors, time.perf_counter() - start
+
+
+def time_cli(page, runs):
+    """Latencies of runs fresh "python read_html_table.py" processes on page."""
+    latencies = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "page.html")
+        with open(path, "wb") as f:
+            f.write(page)
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, os.path.join(HERE, "read_html_table.py"),
+                            "--out-dir", tmp, path], check=True, stdout=subprocess.DEVNULL)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def summarize(name, latencies, errors=0, elapsed=None):
+    """Result dict of one measurement; latencies are in seconds."""
+    latencies = sorted(latencies)
+    result = {"name": name, "requests": len(latencies), "errors": errors}
+    if elapsed:
+        result["requests_per_s"] = len(latencies) / elapsed
+    for q in (50, 90, 99):
+        result[f"p{q}_ms"] = percentile(latencies, q) * 1000 if latencies else None
+    result["max_ms"] = latencies[-1] * 1000 if latencies else None
+    return result
+
+
+def print_result(r):
+    def ms(value):
+        return f"{value:>8.2f}" if value is not None else f"{'-':>8}"
+    rate = f"{r['requests_per_s']:>8.1f}" if "requests_per_s" in r else f"{'-':>8}"
+    print(f"{r['name']:14} {r['requests']:>8} {r['errors']:>6} {rate} "
+          f"{ms(r['p50_ms'])} {ms(r['p90_ms'])} {ms(r['p99_ms'])} {ms(r['max_ms'])}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Measure the latency of serve_html_table.py under load.")
+    ap.add_argument("--server", default=None, metavar="URL",
+                    help="running server to test, e.g. http://127.0.0.1:8350 "
+                         "(default: start one in this process)")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="worker processes of the started server (default: number of cores)")
+    ap.add_argument("--page", default=FIXTURE, help="HTML file to post (default: the project02 fixture)")
+    ap.add_argument("--shape", choices=SHAPES, default=None,
+                    help="post a synthetic bench_read_html_table.py page instead of --page")
+    ap.add_argument("--scale", type=int, default=1, help="scale of the --shape page (default: 1)")
+    ap.add_argument("--requests", type=int, default=1000, help="requests to send (default: %(default)s)")
+    ap.add_argument("--concurrency", type=int, default=8,
+                    help="client threads, one connection each (default: %(default)s)")
+    ap.add_argument("--format", choices=("json", "csv"), default="json",
+                    help="response format requested (default: %(default)s)")
+    ap.add_argument("--query", default="", metavar="PARAMS",
+                    help='further /extract parameters, e.g. "select=table.wikitable&max_tables=1"')
+    ap.add_argument("--cli-runs", type=int, default=0,
+                    help="also time N runs of read_html_table.py as a new process")
+    ap.add_argument("--output", default=None, help="write the results as JSON to FILE")
+    args = ap.parse_args()
+    if args.requests < 1 or args.concurrency < 1:
+        ap.error("--requests and --concurrency must be at least 1")
+
+    if args.shape:
+        page = generate_page(args.shape, args.scale).encode("utf-8")
+    else:
+        with open(args.page, "rb") as f:
+            page = f.read()
+    path = f"/extract?format={args.format}" + (f"&{args.query}" if args.query else "")
+
+    server = thread = None
+    server_url = args.server
+    if server_url is None:
+        server = ExtractionServer(("127.0.0.1", 0), args.workers, quiet=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        server_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    results = []
+    print(f"{len(page) / 1024:.1f} KB page, {args.requests} requests from {args.concurrency} "
+          f"connections to {server_url}")
+    print(f"{'':14} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8}")
+    try:
+        latencies, errors, elapsed = load_test(server_url, page, args.requests, args.concurrency, path)
+        results.append(summarize("server", latencies, len(errors), elapsed))
+        print_result(results[-1])
+        if errors:
+            print(f"first error: {errors[0]}", file=sys.stderr)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    if args.cli_runs:
+        results.append(summarize("cli process", time_cli(page, args.cli_runs)))
+        print_result(results[-1])
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"page_bytes": len(page), "concurrency": args.concurrency, "results": results},
+                      f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+check_read_html_table.py
+
+Usage:
+    python check_read_html_table.py [NAME ...]
+
+Behaviour checks for read_html_table.py that need nothing but this
+repository: each check parses a small page or talks to a local
+http.server stand-in started on a free port, and fails with the
+difference it found. Without arguments every check runs; otherwise only
+the checks whose names contain one of the given words.
+
+Only Python standard libraries are used (no external packages).
+"""
+
+import contextlib
+import csv
+import gzip
+import http.client
+import http.server
+import io
+import json
+import os
+import socket
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import urllib.error
+
+from read_html_table import (ConcurrentFetcher, ExtractOptions, HTTPCache, RevisionEntry,
+                             RevisionStore, RowFilter, Stats, TableHTMLParser, TableSelector,
+                             extract_html, extract_source, iter_tables, run_batch)
+from serve_html_table import ExtractionServer
+
+
+class CheckFailed(Exception):
+    """A check found a result that differs from the expected one."""
+
+
+def expect_equal(actual, expected, what):
+    if actual != expected:
+        raise CheckFailed(f"{what}:\n  expected {expected!r}\n  got      {actual!r}")
+
+
+def parse(page, **parse_options):
+    parser = TableHTMLParser(**parse_options)
+    parser.feed(page)
+    parser.close()
+    return parser.tables
+
+
+NESTED_IN_SECOND_COLUMN = ("<table><tr><th>A</th><th>B</th></tr>"
+                           "<tr><td>a1</td><td>x<table><tr><td>in</td></tr></table></td></tr>"
+                           "<tr><td>a2</td><td>b2</td></tr></table>")
+
+
+def check_nested_table_in_projected_out_cell():
+    # A nested <table> inside a cell that --columns drops must not close the outer table.
+    expect_equal(parse(NESTED_IN_SECOND_COLUMN),
+                 [[["A", "B"], ["a1", "x"], ["a2", "b2"]], [["in"]]], "no options")
+    for columns in (["A"], [0]):
+        tables = parse(NESTED_IN_SECOND_COLUMN, columns=columns)
+        expect_equal(tables[0], [["A"], ["a1"], ["a2"]], f"outer table with columns={columns}")
+        expect_equal(len(tables), 2, f"tables with columns={columns}")
+
+
+def check_expand_spans_fills_the_grid():
+    page = ("<table><tr><th rowspan=2>A</th><th colspan=2>B</th></tr>"
+            "<tr><td>b1</td><td>b2</td></tr>"
+            "<tr><td colspan=3>all</td><td>x</td></tr>"
+            "<tr><td rowspan=0>r</td><td>1</td></tr><tr><td>2</td></tr></table>")
+    expect_equal(parse(page, expand_spans=True),
+                 [[["A", "B", "B", ""], ["A", "b1", "b2", ""], ["all", "all", "all", "x"],
+                   ["r", "1", "", ""], ["r", "2", "", ""]]], "expanded grid")
+    expect_equal(parse(page)[0][:2], [["A", "B"], ["b1", "b2"]], "cells without expand_spans")
+
+
+LANGUAGES = ("<table><tr><th>Name</th><th>Year</th><th>Typed</th></tr>"
+             "<tr><td>C</td><td>1972</td><td>Yes</td></tr>"
+             "<tr><td>Java</td><td>1995</td><td>Yes</td></tr>"
+             "<tr><td>Python</td><td>1991</td><td>No</td></tr>"
+             "<tr><td>Go</td><td>n/a</td><td>Yes</td></tr></table>")
+
+
+def check_where_keeps_matching_rows():
+    # The header row is always kept; a cell that is not a number never matches a numeric comparison.
+    expect_equal(parse(LANGUAGES, where=RowFilter("Year >= 1990 and Typed == Yes")),
+                 [[["Name", "Year", "Typed"], ["Java", "1995", "Yes"]]], "numeric and exact")
+    expect_equal([row[0] for row in parse(LANGUAGES, where=RowFilter("name ~= O or not (1 > 1980)"))[0]],
+                 ["Name", "C", "Python", "Go"], "contains, index column and not")
+
+
+SELECT_PAGE = ('<table class=nav><tr><td><table class="wikitable"><tr><td>inner</td></tr></table>'
+               '</td></tr></table>'
+               '<table class="wikitable sortable"><caption>Languages</caption>'
+               '<tr><td>w<table class=nav><tr><td>n</td></tr></table></td></tr></table>'
+               '<table id=x><tr><td>other</td></tr></table>')
+
+
+def check_select_with_nested_tables():
+    # A match inside a skipped table is found; a non-match inside a kept table is skipped.
+    expect_equal(parse(SELECT_PAGE, select=TableSelector("table.wikitable")), [[["inner"]], [["w"]]],
+                 "table.wikitable")
+    expect_equal(parse(SELECT_PAGE, select=TableSelector("caption~=language, #x")), [[["w"]], [["other"]]],
+                 "caption or id")
+    expect_equal(parse(SELECT_PAGE, select=TableSelector("table.wikitable"), table_index=1), [[["w"]]],
+                 "table.wikitable with table_index=1")
+
+
+def check_manifest_skips_unchanged_source():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "page.html")
+        out = os.path.join(tmp, "out")
+        options = ExtractOptions(manifest=os.path.join(tmp, "manifest.db"))
+
+        def run(page):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(page)
+            stats = Stats()
+            extract_source(path, out, options, verbose=False, stats=stats)
+            return [stats.counters[name] for name in ("sources_unchanged", "tables_unchanged",
+                                                      "tables_removed")]
+
+        first, second = "<table><tr><td>1</td></tr></table>", "<table><tr><td>2</td></tr></table>"
+        table_0 = os.path.join(out, "table_0.csv")
+        expect_equal(run(first + second), [0, 0, 0], "sources, tables unchanged and tables removed")
+        written = os.path.getmtime(table_0)
+        expect_equal(run(first + second), [1, 0, 0], "same counts for the unchanged page")
+        expect_equal(run(first), [0, 1, 1], "same counts for the page without its second table")
+        expect_equal(sorted(os.listdir(out)), ["table_0.csv"], "files left")
+        expect_equal(os.path.getmtime(table_0), written, "mtime of the unchanged table")
+
+
+def check_revisions_write_row_deltas():
+    # Rows are keyed by their first cell: + added, ~ changed, - removed (with the old cells).
+    with tempfile.TemporaryDirectory() as tmp:
+        entry = RevisionEntry(os.path.join(tmp, "revisions.db"), "page", delta=True)
+        delta = os.path.join(tmp, "table_0.delta.csv")
+
+        def run(rows):
+            page = "<table>" + "".join(f"<tr><td>{a}</td><td>{b}</td></tr>" for a, b in rows) + "</table>"
+            extract_html(page, tmp, verbose=False, revisions=entry)
+            if not os.path.exists(delta):
+                return None
+            with open(delta, newline="", encoding="utf-8") as f:
+                return list(csv.reader(f))
+
+        expect_equal(run([("C", 1972), ("Java", 1995)]), [["+", "C", "1972"], ["+", "Java", "1995"]],
+                     "first run")
+        expect_equal(run([("C", 1972), ("Java", 1995)]), None, "delta of an unchanged table")
+        expect_equal(run([("C", 1973), ("Go", 2009)]),
+                     [["~", "C", "1973"], ["+", "Go", "2009"], ["-", "Java", "1995"]], "delta of the changes")
+        store = RevisionStore(entry.path)
+        try:
+            rev, rows, _ = store.load("page", "", 0)
+            expect_equal((rev, [cells for _, cells in rows.values()]), (1, [["C", "1973"], ["Go", "2009"]]),
+                         "latest revision rebuilt")
+            expect_equal([cells for _, cells in store.load("page", "", 0, rev=0)[1].values()],
+                         [["C", "1972"], ["Java", "1995"]], "first revision rebuilt")
+        finally:
+            store.close()
+
+
+def check_iter_tables_numbers_tables_like_the_cli():
+    # Table.index is the N of the table_N.csv that the CLI writes with the same options.
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "page.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("<table><tr><td>a<table><tr><td>in</td></tr></table></td></tr></table>"
+                    "<table class=x><tr><td>b</td></tr></table>")
+        for options, expected in (({}, [(0, "a"), (1, "in"), (2, "b")]),
+                                  ({"table_index": 2}, [(2, "b")]),
+                                  ({"max_tables": 2}, [(0, "a"), (1, "in")]),
+                                  ({"select": TableSelector("table.x")}, [(0, "b")])):
+            tables = [(table.index, list(table.rows)[0][0]) for table in iter_tables(path, **options)]
+            expect_equal(tables, expected, f"iter_tables with {options}")
+
+
+def check_sqlite_sink_drops_tables_of_earlier_runs():
+    with tempfile.TemporaryDirectory() as tmp:
+        two = "<table><tr><td>a</td></tr></table><table><tr><td>b</td></tr></table>"
+        extract_html(two, tmp, verbose=False, sinks=[("sqlite", None)])
+        extract_html("<table><tr><td>c</td></tr></table>", tmp, verbose=False, sinks=[("sqlite", None)])
+        db = sqlite3.connect(os.path.join(tmp, "tables.db"))
+        try:
+            names = [name for (name,) in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+            expect_equal(names, ["table_0"], "tables after the second run")
+            expect_equal(db.execute('SELECT * FROM "table_0"').fetchall(), [(0, "c")], "rows of table_0")
+        finally:
+            db.close()
+
+
+def page(n):
+    return f"<html><body><table><tr><td>page</td><td>{n}</td></tr></table></body></html>".encode()
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Pages for the fetch checks:
+        /page/N      a one-table page; ETag "vN", answered with 304 on If-None-Match
+        /slow/N      /page/N after SLOW_SECONDS
+        /gzip/N      /page/N with Content-Encoding: gzip
+        /redirect/N  302 to /page/N
+        /loop        302 to itself
+        anything else 404
+    """
+
+    protocol_version = "HTTP/1.1"
+    SLOW_SECONDS = 0.2
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, dict(self.headers)))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            self._answer()
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _answer(self):
+        parts = self.path.strip("/").split("/")
+        kind, n = parts[0], parts[1] if len(parts) > 1 else ""
+        if kind == "redirect":
+            return self._send(302, b"", {"Location": f"/page/{n}"})
+        if kind == "loop":
+            return self._send(302, b"", {"Location": "/loop"})
+        if kind not in ("page", "slow", "gzip") or not n.isdigit():
+            return self._send(404, b"not found")
+        etag = f'"v{n}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, b"", {"ETag": etag})
+        if kind == "slow":
+            time.sleep(self.SLOW_SECONDS)
+        if kind == "gzip":
+            return self._send(200, gzip.compress(page(n)), {"Content-Encoding": "gzip"})
+        self._send(200, page(n), {"ETag": etag})
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def stand_in_server():
+    """A StandInHandler server on a free port; yields it with .url set."""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.requests = []
+    server.in_flight = server.max_in_flight = 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def fetch_all(fetcher, urls):
+    """{index: (body, charset, network) or the exception} from fetcher.fetch_all()."""
+    try:
+        return {i: error if error is not None else result
+                for i, _, result, error in fetcher.fetch_all(urls)}
+    finally:
+        fetcher.close()
+
+
+def check_fetch_reuses_keep_alive_connections():
+    with stand_in_server() as server:
+        fetcher = ConcurrentFetcher(workers=4, per_host=2)
+        urls = [f"{server.url}/page/{i}" for i in range(12)]
+        results = fetch_all(fetcher, urls)
+        expect_equal([results[i][0] for i in range(12)], [page(i) for i in range(12)], "bodies")
+        expect_equal(len(server.requests), 12, "requests served")
+        if not 1 <= server.connections <= 2:
+            raise CheckFailed(f"12 requests with per_host=2 opened {server.connections} connections")
+        expect_equal(fetcher.pool.connections_opened, server.connections,
+                     "connections counted by the pool")
+
+
+def check_fetch_caps_requests_per_host():
+    with stand_in_server() as server:
+        fetch_all(ConcurrentFetcher(workers=8, per_host=3),
+                  [f"{server.url}/slow/{i}" for i in range(9)])
+        # Each request takes SLOW_SECONDS, so 8 workers keep the host at its cap.
+        expect_equal(server.max_in_flight, 3, "most requests in flight at once with per_host=3")
+        expect_equal(len(server.requests), 9, "requests served")
+
+
+def check_fetch_follows_redirects_and_decodes_gzip():
+    with stand_in_server() as server:
+        results = fetch_all(ConcurrentFetcher(workers=2),
+                            [f"{server.url}/redirect/7", f"{server.url}/gzip/8"])
+        expect_equal(results[0][:2], (page(7), "utf-8"), "redirected body")
+        expect_equal(results[1][:2], (page(8), "utf-8"), "gzip body")
+        expect_equal(sorted(path for path, _ in server.requests),
+                     ["/gzip/8", "/page/7", "/redirect/7"], "requests made")
+        if not 0 < results[1][2][2] < len(page(8)) + 64:
+            raise CheckFailed(f"gzip download counted {results[1][2][2]} bytes on the wire")
+
+
+def check_fetch_reports_errors_per_url():
+    with stand_in_server() as server:
+        closed = http.server.HTTPServer(("127.0.0.1", 0), StandInHandler)
+        closed_url = f"http://127.0.0.1:{closed.server_address[1]}/page/1"
+        closed.server_close()
+        urls = [f"{server.url}/page/0", f"{server.url}/missing", f"{server.url}/loop",
+                f"{server.url}/page/3", closed_url]
+        results = fetch_all(ConcurrentFetcher(workers=3, per_host=2), urls)
+        expect_equal(results[0][0], page(0), "first page")
+        expect_equal(results[3][0], page(3), "page after the failures")
+        if not (isinstance(results[1], urllib.error.HTTPError) and results[1].code == 404):
+            raise CheckFailed(f"/missing gave {results[1]!r}, not HTTP 404")
+        if not (isinstance(results[2], urllib.error.URLError) and "redirects" in str(results[2])):
+            raise CheckFailed(f"/loop gave {results[2]!r}, not too many redirects")
+        if not isinstance(results[4], OSError):
+            raise CheckFailed(f"closed port gave {results[4]!r}, not a connection error")
+
+
+def check_fetch_revalidates_cached_pages():
+    with stand_in_server() as server, tempfile.TemporaryDirectory() as tmp:
+        url = f"{server.url}/page/5"
+        first = fetch_all(ConcurrentFetcher(cache=HTTPCache(tmp)), [url])[0]
+        second = fetch_all(ConcurrentFetcher(cache=HTTPCache(tmp)), [url])[0]
+        expect_equal(second[0], first[0], "body served from the cache")
+        expect_equal([headers.get("If-None-Match") for _, headers in server.requests],
+                     [None, '"v5"'], "If-None-Match of the two requests")
+        fresh = fetch_all(ConcurrentFetcher(cache=HTTPCache(tmp, ttl=60)), [url])[0]
+        expect_equal(fresh[0], first[0], "body of a fresh entry")
+        expect_equal(len(server.requests), 2, "requests once the entry is fresh")
+
+
+def check_batch_reports_errors_per_source():
+    # Without --fetch-workers the errors come back from the worker processes.
+    with stand_in_server() as server, tempfile.TemporaryDirectory() as tmp:
+        sources = [os.path.join(tmp, "missing.html"), f"{server.url}/missing", f"{server.url}/page/2"]
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            failures = run_batch(sources, os.path.join(tmp, "out"), jobs=2)
+        expect_equal(failures, 2, "failed sources")
+        lines = err.getvalue().splitlines()
+        expect_equal(len(lines), 2, f"error lines {lines}")
+        if not (lines[0].startswith(f"FAILED {sources[0]}: ") and "No such file" in lines[0]):
+            raise CheckFailed(f"missing file reported as {lines[0]!r}")
+        if not lines[1].startswith(f"FAILED {sources[1]}: ") or "HTTP Error 404: Not Found" not in lines[1]:
+            raise CheckFailed(f"404 reported as {lines[1]!r}")
+        expect_equal(out.getvalue().count("Wrote 1 table(s)"), 1, "sources written")
+
+
+def check_server_gives_up_on_silent_origin():
+    # An origin that accepts the connection and never answers must not hold the worker.
+    silent = socket.socket()
+    silent.bind(("127.0.0.1", 0))
+    silent.listen()
+    server = ExtractionServer(("127.0.0.1", 0), workers=1, timeout=1, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    try:
+        start = time.monotonic()
+        conn.request("GET", f"/extract?url=http://127.0.0.1:{silent.getsockname()[1]}/")
+        response = conn.getresponse()
+        body = json.loads(response.read())
+        expect_equal(response.status, 502, f"status of the silent origin ({body})")
+        conn.request("POST", "/extract", b"<table><tr><td>ok</td></tr></table>")
+        response = conn.getresponse()
+        expect_equal((response.status, json.loads(response.read())), (200, {"tables": [[["ok"]]]}),
+                     "next request on the same worker")
+        if time.monotonic() - start > 3:
+            raise CheckFailed(f"took {time.monotonic() - start:.1f} s with timeout=1")
+    finally:
+        conn.close()
+        server.shutdown()
+        server.server_close()
+        thread.join()
+        silent.close()
+
+
+def check_server_refuses_unknown_charset():
+    server = ExtractionServer(("127.0.0.1", 0), workers=0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    try:
+        page = b"<table><tr><td>caf\xe9</td></tr></table>"
+        answers = []
+        for charset in ("bogus", "latin-1"):
+            conn.request("POST", "/extract", page, {"Content-Type": f"text/html; charset={charset}"})
+            response = conn.getresponse()
+            answers.append((response.status, json.loads(response.read())))
+        expect_equal(answers, [(400, {"error": "unknown charset: bogus"}),
+                               (200, {"tables": [[["caf\u00e9"]]]})], "answers")
+    finally:
+        conn.close()
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+CHECKS = [
+    check_nested_table_in_projected_out_cell,
+    check_expand_spans_fills_the_grid,
+    check_where_keeps_matching_rows,
+    check_select_with_nested_tables,
+    check_manifest_skips_unchanged_source,
+    check_revisions_write_row_deltas,
+    check_iter_tables_numbers_tables_like_the_cli,
+    check_sqlite_sink_drops_tables_of_earlier_runs,
+    check_fetch_reuses_keep_alive_connections,
+    check_fetch_caps_requests_per_host,
+    check_fetch_follows_redirects_and_decodes_gzip,
+    check_fetch_reports_errors_per_url,
+    check_fetch_revalidates_cached_pages,
+    check_batch_reports_errors_per_source,
+    check_server_gives_up_on_silent_origin,
+    check_server_refuses_unknown_charset,
+]
+
+
+def main(argv=None):
+    words = sys.argv[1:] if argv is None else argv
+    checks = [c for c in CHECKS if not words or any(w in c.__name__ for w in words)]
+    failures = 0
+    for check in checks:
+        name = check.__name__[len("check_"):]
+        try:
+            check()
+        except CheckFailed as e:
+            failures += 1
+            print(f"FAIL {name}: {e}")
+        except Exception:
+            failures += 1
+            print(f"ERROR {name}:")
+            traceback.print_exc(file=sys.stdout)
+        else:
+            print(f"ok   {name}")
+    print(f"\n{len(checks) - failures} of {len(checks)} checks passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+from table_to_csv import BestTableParser, TableHTMLParser, iter_html_chunks
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE = os.path.join(HERE, "..", "..", "grading", "fixtures", "project02_input.html")
+
+
+def parse_all(path: str) -> tuple:
+    """Return what stays in memory and the number of tables."""
+    parser = TableHTMLParser()
+    for chunk in iter_html_chunks(path):
+        parser.feed(chunk)
+    parser.close()
+    return parser.tables, len(parser.tables)
+
+
+def parse_best(path: str) -> tuple:
+    # What table_to_csv.py does without --list: only the best table keeps its rows
+    parser = BestTableParser()
+    for chunk in iter_html_chunks(path):
+        parser.feed(chunk)
+    parser.close()
+    return parser, len(parser.features)
+
+
+def measure(path: str, parse=parse_all) -> dict:
+    """Parse path under tracemalloc; report memory still held by the tables and the peak."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        kept, tables = parse(path)
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"tables": tables, "retained": retained, "peak": peak, "seconds": elapsed}
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(
+        description="Measure the memory TableHTMLParser needs to hold every table of a scaled page."
+    )
+    ap.add_argument("--best", action="store_true",
+                    help="measure BestTableParser instead, which keeps only the best table's rows")
+    ap.add_argument("source", nargs="?", default=FIXTURE, help="local HTML file (default: the project02 fixture)")
+    ap.add_argument("--scale", type=int, nargs="+", default=[1, 10, 50],
+                    help="how many copies of the page each input contains (default: 1 10 50)")
+    args = ap.parse_args(argv)
+
+    with open(args.source, "rb") as f:
+        page = f.read()
+
+    print(f"{'scale':>6} {'page MB':>8} {'tables':>7} {'retained MB':>12} {'peak MB':>8} {'parse s':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scale:
+            path = os.path.join(tmp, f"page_x{scale}.html")
+            with open(path, "wb") as f:
+                f.write(page * scale)
+            r = measure(path, parse_best if args.best else parse_all)
+            print(f"{scale:>6} {len(page) * scale / 1048576:>8.1f} {r['tables']:>7} "
+                  f"{r['retained'] / 1048576:>12.2f} {r['peak'] / 1048576:>8.2f} {r['seconds']:>8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
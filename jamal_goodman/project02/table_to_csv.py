@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import argparse
+import codecs
 import csv
 import html
 import os
@@ -8,12 +9,23 @@ import re
 import sys
 import urllib.request
 import urllib.parse
+import zlib
+from array import array
 from html.parser import HTMLParser
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any
 
 
 WHITESPACE_RE = re.compile(r"\s+")
 BRACKETED_REF_RE = re.compile(r"\[\s*\d+\s*\]")  # Wikipedia-style [1], [23], etc.
+CHUNK_SIZE = 64 * 1024
+# What --list needs to see: table/tr/td/th tags and whole captions; comments, scripts and styles are skipped
+LIST_SCAN_RE = re.compile(r"<(?:(?P<open>!--|script\b|style\b|caption\b)|/?(?:table|tr|td|th)\b)", re.IGNORECASE)
+LIST_SCAN_ENDS = {
+    "!--": re.compile(r"-->"),
+    "script": re.compile(r"</script", re.IGNORECASE),
+    "style": re.compile(r"</style", re.IGNORECASE),
+    "caption": re.compile(r"</caption", re.IGNORECASE),
+}
 
 
 def clean_text(s: str) -> str:
@@ -24,6 +36,65 @@ def clean_text(s: str) -> str:
     return s
 
 
+class CompactTable:
+    """
+    One parsed table, stored compactly instead of as a dict per cell.
+
+    The cell texts of all rows live in one flat list; row_ends[i] is the index just
+    past the last cell of row i, and bit k of header_bits is set when cell k was a <th>.
+    """
+
+    __slots__ = ("attrs", "caption", "texts", "row_ends", "header_bits")
+
+    def __init__(self, attrs: Dict[str, str]) -> None:
+        self.attrs = attrs
+        self.caption = ""
+        self.texts: List[str] = []
+        self.row_ends = array("I")
+        self.header_bits = bytearray()
+
+    def append_row(self, cells: List[str], header_mask: int) -> None:
+        """Add a row; bit j of header_mask is set when cell j is a <th>."""
+        k = len(self.texts)
+        self.texts.extend(cells)
+        self.row_ends.append(len(self.texts))
+        self.header_bits.extend(bytes((len(self.texts) + 7) // 8 - len(self.header_bits)))
+        while header_mask:
+            if header_mask & 1:
+                self.header_bits[k >> 3] |= 1 << (k & 7)
+            header_mask >>= 1
+            k += 1
+
+    def __len__(self) -> int:
+        return len(self.row_ends)
+
+    def _bounds(self, i: int) -> tuple:
+        return (self.row_ends[i - 1] if i else 0), self.row_ends[i]
+
+    def row(self, i: int) -> List[str]:
+        start, end = self._bounds(i)
+        return self.texts[start:end]
+
+    def rows(self) -> Iterator[List[str]]:
+        for i in range(len(self.row_ends)):
+            yield self.row(i)
+
+    def row_length(self, i: int) -> int:
+        start, end = self._bounds(i)
+        return end - start
+
+    def header_count(self, i: int) -> int:
+        """Number of <th> cells in row i."""
+        start, end = self._bounds(i)
+        return sum(1 for k in range(start, end) if self.header_bits[k >> 3] >> (k & 7) & 1)
+
+    def clear(self) -> None:
+        """Drop the rows (attrs and caption stay)."""
+        self.texts = []
+        self.row_ends = array("I")
+        self.header_bits = bytearray()
+
+
 class TableHTMLParser(HTMLParser):
     """
     Minimal, generic HTML table parser using only the standard library.
@@ -31,11 +102,14 @@ class TableHTMLParser(HTMLParser):
     Captures:
     - tables -> rows -> cells
     - distinguishes headers (<th>) vs data (<td>) by tagging, but output is just text.
+
+    Subclasses can override start_table(), set_caption(), add_row() and end_table()
+    to do something else with each table than collect it in self.tables.
     """
 
     def __init__(self) -> None:
         super().__init__(convert_charrefs=False)
-        self.tables: List[Dict[str, Any]] = []
+        self.tables: List[CompactTable] = []
 
         self._in_table = False
         self._in_tr = False
@@ -43,8 +117,9 @@ class TableHTMLParser(HTMLParser):
         self._in_th = False
         self._in_caption = False
 
-        self._current_table: Optional[Dict[str, Any]] = None
-        self._current_row: Optional[List[Dict[str, str]]] = None
+        self._current_table: Optional[CompactTable] = None
+        self._current_row: Optional[List[str]] = None
+        self._current_row_headers = 0  # bit j set when cell j of the row is a <th>
         self._current_cell_text_parts: List[str] = []
 
     def handle_starttag(self, tag: str, attrs: List[tuple]) -> None:
@@ -53,11 +128,7 @@ class TableHTMLParser(HTMLParser):
         if tag == "table":
             self._in_table = True
             attr_dict = {k.lower(): (v if v is not None else "") for k, v in attrs}
-            self._current_table = {
-                "attrs": attr_dict,
-                "caption": "",
-                "rows": [],  # list of rows; each row is list of {"type": "th"/"td", "text": "..."}
-            }
+            self._current_table = self.start_table(attr_dict)
             return
 
         if not self._in_table:
@@ -71,6 +142,7 @@ class TableHTMLParser(HTMLParser):
         if tag == "tr":
             self._in_tr = True
             self._current_row = []
+            self._current_row_headers = 0
             return
 
         if tag == "td":
@@ -92,7 +164,7 @@ class TableHTMLParser(HTMLParser):
 
         if tag == "table":
             if self._current_table is not None:
-                self.tables.append(self._current_table)
+                self.end_table(self._current_table)
             self._in_table = False
             self._current_table = None
             self._in_tr = self._in_td = self._in_th = self._in_caption = False
@@ -104,22 +176,22 @@ class TableHTMLParser(HTMLParser):
             return
 
         if tag == "caption":
-            text = clean_text("".join(self._current_cell_text_parts))
-            self._current_table["caption"] = text
+            self.set_caption(clean_text("".join(self._current_cell_text_parts)))
             self._in_caption = False
             self._current_cell_text_parts = []
             return
 
         if tag == "td" and self._in_td and self._current_row is not None:
             text = clean_text("".join(self._current_cell_text_parts))
-            self._current_row.append({"type": "td", "text": text})
+            self._current_row.append(text)
             self._in_td = False
             self._current_cell_text_parts = []
             return
 
         if tag == "th" and self._in_th and self._current_row is not None:
             text = clean_text("".join(self._current_cell_text_parts))
-            self._current_row.append({"type": "th", "text": text})
+            self._current_row_headers |= 1 << len(self._current_row)
+            self._current_row.append(text)
             self._in_th = False
             self._current_cell_text_parts = []
             return
@@ -127,7 +199,7 @@ class TableHTMLParser(HTMLParser):
         if tag == "tr" and self._in_tr and self._current_row is not None:
             # Store row if it has any cells
             if len(self._current_row) > 0:
-                self._current_table["rows"].append(self._current_row)
+                self.add_row(self._current_row, self._current_row_headers)
             self._in_tr = False
             self._current_row = None
             return
@@ -138,6 +210,18 @@ class TableHTMLParser(HTMLParser):
         if self._in_td or self._in_th or self._in_caption:
             self._current_cell_text_parts.append(data)
 
+    def start_table(self, attrs: Dict[str, str]) -> CompactTable:
+        return CompactTable(attrs)
+
+    def set_caption(self, text: str) -> None:
+        self._current_table.caption = text
+
+    def add_row(self, cells: List[str], header_mask: int) -> None:
+        self._current_table.append_row(cells, header_mask)
+
+    def end_table(self, table: CompactTable) -> None:
+        self.tables.append(table)
+
     def handle_entityref(self, name: str) -> None:
         # Preserve entities; we'll unescape in clean_text()
         if self._in_td or self._in_th or self._in_caption:
@@ -148,80 +232,275 @@ class TableHTMLParser(HTMLParser):
             self._current_cell_text_parts.append(f"&#{name};")
 
 
-def read_html(source: str, user_agent: str = "table_to_csv.py (standard library)") -> str:
-    """Read HTML from a URL (http/https) or local file path."""
-    parsed = urllib.parse.urlparse(source)
-    if parsed.scheme in ("http", "https"):
-        req = urllib.request.Request(
-            source,
-            headers={"User-Agent": user_agent, "Accept": "text/html,application/xhtml+xml"},
+class TableSummary:
+    """Attributes, caption and row/cell counts of one table, without any cell text."""
+
+    __slots__ = ("attrs", "caption", "rows", "cells", "first_row_cells")
+
+    def __init__(self, attrs: Dict[str, str]) -> None:
+        self.attrs = attrs
+        self.caption = ""
+        self.rows = 0
+        self.cells = 0
+        self.first_row_cells = 0
+
+
+class TableScanParser(TableHTMLParser):
+    """
+    Metadata-only pass for --list: counts the rows and cells of every table and keeps its
+    attributes and caption, but never builds cell text. self.tables holds TableSummary objects.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._row_cells = 0
+
+    def handle_starttag(self, tag: str, attrs: List[tuple]) -> None:
+        super().handle_starttag(tag, attrs)
+        if tag.lower() == "tr" and self._in_table:
+            self._row_cells = 0
+
+    def handle_endtag(self, tag: str) -> None:
+        tag = tag.lower()
+
+        if tag in ("td", "th"):
+            if (self._in_td if tag == "td" else self._in_th) and self._current_row is not None:
+                self._row_cells += 1
+                self._in_td = self._in_th = False
+            return
+
+        if tag == "tr":
+            if self._in_table and self._in_tr and self._current_row is not None:
+                # Rows without cells are not stored by TableHTMLParser either
+                if self._row_cells:
+                    table = self._current_table
+                    if not table.rows:
+                        table.first_row_cells = self._row_cells
+                    table.rows += 1
+                    table.cells += self._row_cells
+                self._in_tr = False
+                self._current_row = None
+            return
+
+        super().handle_endtag(tag)
+
+    def handle_data(self, data: str) -> None:
+        if self._in_caption:
+            self._current_cell_text_parts.append(data)
+
+    def handle_entityref(self, name: str) -> None:
+        if self._in_caption:
+            self._current_cell_text_parts.append(f"&{name};")
+
+    def handle_charref(self, name: str) -> None:
+        if self._in_caption:
+            self._current_cell_text_parts.append(f"&#{name};")
+
+    def start_table(self, attrs: Dict[str, str]) -> TableSummary:
+        return TableSummary(attrs)
+
+
+def iter_table_tag_chunks(chunks: Iterator[str]) -> Iterator[str]:
+    """
+    Reduce HTML chunks to the table, tr, td and th tags and whole caption elements, so that
+    TableScanParser never tokenizes the rest of the page.
+    """
+    buf = ""
+    for chunk in chunks:
+        buf += chunk
+        out = []
+        pos = 0
+        while True:
+            m = LIST_SCAN_RE.search(buf, pos)
+            if m is None:
+                pos = max(pos, len(buf) - 16)  # a tag name may be split across chunks
+                break
+            opener = m.group("open")
+            end = m.end()
+            if opener is not None:
+                close = LIST_SCAN_ENDS[opener.lower()].search(buf, end)
+                end = close.start() if close else -1
+            if end != -1:
+                end = buf.find(">", end)
+            if end == -1:
+                pos = m.start()  # incomplete; wait for the next chunk
+                break
+            if opener is None or opener.lower() == "caption":
+                out.append(buf[m.start():end + 1])
+            pos = end + 1
+        buf = buf[pos:]
+        if out:
+            yield "".join(out)
+
+
+def decompressor_for(content_encoding: str, first_bytes: bytes) -> Optional[Any]:
+    """Return a zlib decompressor for a gzip/deflate Content-Encoding, or None for identity."""
+    encoding = (content_encoding or "").strip().lower()
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        # "deflate" should be zlib-wrapped, but some servers send raw deflate
+        zlib_header = (
+            len(first_bytes) >= 2
+            and first_bytes[0] & 0x0F == 8
+            and (first_bytes[0] << 8 | first_bytes[1]) % 31 == 0
         )
-        with urllib.request.urlopen(req) as resp:
-            raw = resp.read()
-            # Try charset from headers; fallback to utf-8 with replacement
-            content_type = resp.headers.get("Content-Type", "")
-            m = re.search(r"charset=([A-Za-z0-9_\-]+)", content_type, re.IGNORECASE)
-            encoding = m.group(1) if m else "utf-8"
-            return raw.decode(encoding, errors="replace")
-    else:
-        with open(source, "rb") as f:
-            raw = f.read()
+        return zlib.decompressobj(zlib.MAX_WBITS if zlib_header else -zlib.MAX_WBITS)
+    return None
+
+
+def iter_html_chunks(
+    source: str, user_agent: str = "table_to_csv.py (standard library)", verbose: bool = False
+) -> Iterator[str]:
+    """
+    Read HTML from a URL (http/https) or local file path as decoded text chunks.
+
+    URLs are requested with gzip/deflate compression, which is undone one network
+    chunk at a time so the compressed and decompressed pages are never buffered together.
+    """
+    parsed = urllib.parse.urlparse(source)
+    if parsed.scheme not in ("http", "https"):
         # Most saved web pages are utf-8; use replacement for safety
-        return raw.decode("utf-8", errors="replace")
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        with open(source, "rb") as f:
+            for raw in iter(lambda: f.read(CHUNK_SIZE), b""):
+                yield decoder.decode(raw)
+        yield decoder.decode(b"", final=True)
+        return
+
+    req = urllib.request.Request(
+        source,
+        headers={
+            "User-Agent": user_agent,
+            "Accept": "text/html,application/xhtml+xml",
+            "Accept-Encoding": "gzip, deflate",
+        },
+    )
+    with urllib.request.urlopen(req) as resp:
+        # Try charset from headers; fallback to utf-8 with replacement
+        content_type = resp.headers.get("Content-Type", "")
+        m = re.search(r"charset=([A-Za-z0-9_\-]+)", content_type, re.IGNORECASE)
+        decoder = codecs.getincrementaldecoder(m.group(1) if m else "utf-8")(errors="replace")
+        content_encoding = resp.headers.get("Content-Encoding", "") or "identity"
+        wire_bytes = decoded_bytes = 0
+        # The first chunk tells zlib-wrapped from raw deflate; the choice is made once
+        raw = resp.read(CHUNK_SIZE)
+        decompressor = decompressor_for(content_encoding, raw)
+        while raw:
+            wire_bytes += len(raw)
+            if decompressor is not None:
+                raw = decompressor.decompress(raw)
+            decoded_bytes += len(raw)
+            yield decoder.decode(raw)
+            raw = resp.read(CHUNK_SIZE)
+        tail = decompressor.flush() if decompressor is not None else b""
+        decoded_bytes += len(tail)
+        yield decoder.decode(tail, final=True)
+
+    if verbose:
+        print(
+            f"Fetched {source}: {wire_bytes} bytes on the wire, {decoded_bytes} bytes decoded ({content_encoding})",
+            file=sys.stderr,
+        )
+
+
+def read_html(source: str, user_agent: str = "table_to_csv.py (standard library)") -> str:
+    """Read HTML from a URL (http/https) or local file path."""
+    return "".join(iter_html_chunks(source, user_agent))
 
 
-def table_headers(table: Dict[str, Any]) -> List[str]:
+def table_headers(table: CompactTable) -> List[str]:
     """Return header texts if the first row is primarily <th>, else empty list."""
-    rows = table.get("rows", [])
-    if not rows:
+    if not len(table):
         return []
-    first = rows[0]
-    th_count = sum(1 for c in first if c["type"] == "th")
-    if th_count >= max(1, len(first) // 2):
-        return [c["text"] for c in first]
+    if table.header_count(0) >= max(1, table.row_length(0) // 2):
+        return table.row(0)
     return []
 
 
-def score_table_for_languages(table: Dict[str, Any]) -> int:
+LANGUAGE_HEADER_KEYS = ("language", "name", "designed", "designer", "appeared", "year", "paradigm")
+
+
+class TableFeatures:
     """
-    Heuristic scoring to auto-pick a "programming languages" table on Wikipedia-like pages.
-    Generic enough to still be useful elsewhere.
+    What the language-table score looks at, kept up to date while a table is parsed:
+    class attribute, caption, header texts (if the first row is primarily <th>) and row count.
     """
-    rows = table.get("rows", [])
-    if len(rows) < 3:
-        return -999  # too small
 
-    attrs = table.get("attrs", {})
-    cls = (attrs.get("class") or "").lower()
-    caption = (table.get("caption") or "").lower()
-    headers = [h.lower() for h in table_headers(table)]
+    __slots__ = ("index", "cls", "caption", "headers", "num_rows")
+
+    def __init__(self, index: int, attrs: Dict[str, str]) -> None:
+        self.index = index
+        self.cls = (attrs.get("class") or "").lower()
+        self.caption = ""
+        self.headers: List[str] = []
+        self.num_rows = 0
+
+    def add_row(self, cells: List[str], header_mask: int) -> None:
+        if self.num_rows == 0 and bin(header_mask).count("1") >= max(1, len(cells) // 2):
+            self.headers = [h.lower() for h in cells]
+        self.num_rows += 1
+
+    @classmethod
+    def of(cls, table: CompactTable, index: int = 0) -> "TableFeatures":
+        features = cls(index, table.attrs)
+        features.caption = table.caption.lower()
+        features.headers = [h.lower() for h in table_headers(table)]
+        features.num_rows = len(table)
+        return features
+
+
+def score_features(features: TableFeatures, best_case: bool = False) -> int:
+    """
+    Score a table from its features. With best_case, return the highest score the table
+    can still reach while it is being parsed: the caption counts as a full match (a later
+    <caption> replaces it), so does a header row it does not have yet, and it counts as
+    having 25 rows.
+    """
+    if features.num_rows < 3 and not best_case:
+        return -999  # too small
 
     score = 0
 
     # Wikipedia tables often use class="wikitable"
-    if "wikitable" in cls:
+    if "wikitable" in features.cls:
         score += 10
 
     # Caption hints
-    if "language" in caption:
-        score += 8
-    if "programming" in caption:
-        score += 6
+    caption = features.caption
+    if best_case:
+        score += 8 + 6
+    else:
+        if "language" in caption:
+            score += 8
+        if "programming" in caption:
+            score += 6
 
     # Header hints
-    header_hits = 0
-    for key in ("language", "name", "designed", "designer", "appeared", "year", "paradigm"):
-        if any(key in h for h in headers):
-            header_hits += 1
-    score += header_hits * 6
+    if best_case and not features.num_rows:
+        score += len(LANGUAGE_HEADER_KEYS) * 6
+    else:
+        header_hits = 0
+        for key in LANGUAGE_HEADER_KEYS:
+            if any(key in h for h in features.headers):
+                header_hits += 1
+        score += header_hits * 6
 
     # Prefer larger tables (often the main comparison table)
-    score += min(25, len(rows))
+    score += 25 if best_case else min(25, features.num_rows)
 
     return score
 
 
-def pick_table(tables: List[Dict[str, Any]], forced_index: Optional[int]) -> int:
+def score_table_for_languages(table: CompactTable) -> int:
+    """
+    Heuristic scoring to auto-pick a "programming languages" table on Wikipedia-like pages.
+    Generic enough to still be useful elsewhere.
+    """
+    return score_features(TableFeatures.of(table))
+
+
+def pick_table(tables: List[CompactTable], forced_index: Optional[int]) -> int:
     """Choose table index either by user-provided index or by heuristic scoring."""
     if not tables:
         raise ValueError("No tables found in the HTML.")
@@ -242,15 +521,89 @@ def pick_table(tables: List[Dict[str, Any]], forced_index: Optional[int]) -> int
     return best_i
 
 
-def table_to_matrix(table: Dict[str, Any]) -> List[List[str]]:
+class BestTableParser(TableHTMLParser):
+    """
+    Picks tables the way pick_table() does, but while parsing: every table gets running
+    TableFeatures, and only the k best-scoring tables so far keep their rows. A table stops
+    storing rows as soon as even its best case cannot beat the k-th candidate, and a
+    candidate pushed out of the top k is cleared, so memory holds k tables rather than
+    the whole page. With forced_index only that table keeps its rows.
+    """
+
+    def __init__(self, k: int = 1, forced_index: Optional[int] = None) -> None:
+        super().__init__()
+        self.k = k
+        self.forced_index = forced_index
+        self.features: List[TableFeatures] = []  # one per table in self.tables order, rows or not
+        self.candidates: List[tuple] = []  # (score, index, table), best first; ties keep the earlier table
+        self.dropped = 0  # tables that stopped storing rows before they closed
+        self._features: Optional[TableFeatures] = None
+        self._keep_rows = False
+
+    def start_table(self, attrs: Dict[str, str]) -> CompactTable:
+        # A table gets the next index if it closes before another <table> starts
+        self._features = TableFeatures(len(self.features), attrs)
+        self._keep_rows = self.forced_index is None or self.forced_index == self._features.index
+        table = super().start_table(attrs)
+        self._check(table)
+        return table
+
+    def set_caption(self, text: str) -> None:
+        super().set_caption(text)
+        self._features.caption = text.lower()
+
+    def add_row(self, cells: List[str], header_mask: int) -> None:
+        features = self._features
+        features.add_row(cells, header_mask)
+        if self._keep_rows:
+            super().add_row(cells, header_mask)
+            if features.num_rows == 1:
+                self._check(self._current_table)
+
+    def end_table(self, table: CompactTable) -> None:
+        features = self._features
+        self.features.append(features)
+        if not self._keep_rows:
+            return
+        if self.forced_index is not None:
+            self.candidates = [(0, features.index, table)]
+            return
+        score = score_features(features)
+        if len(self.candidates) == self.k and score <= self.candidates[-1][0]:
+            table.clear()
+            return
+        self.candidates.append((score, features.index, table))
+        self.candidates.sort(key=lambda c: -c[0])  # stable: the earlier of two equal scores stays first
+        for _, _, loser in self.candidates[self.k:]:
+            loser.clear()
+        del self.candidates[self.k:]
+
+    def _check(self, table: CompactTable) -> None:
+        # Stop storing the open table's rows once its best case cannot beat the k-th candidate
+        if (
+            self._keep_rows
+            and self.forced_index is None
+            and len(self.candidates) == self.k
+            and score_features(self._features, best_case=True) <= self.candidates[-1][0]
+        ):
+            self._keep_rows = False
+            self.dropped += 1
+            table.clear()
+
+    def best_table(self) -> tuple:
+        """Return (index, table) of the chosen table; raises ValueError like pick_table()."""
+        if not self.features:
+            raise ValueError("No tables found in the HTML.")
+        if self.forced_index is not None and not self.candidates:
+            raise ValueError(f"--table index out of range. Found {len(self.features)} tables.")
+        _, index, table = self.candidates[0]
+        return index, table
+
+
+def table_to_matrix(table: CompactTable) -> List[List[str]]:
     """Convert parsed table structure into a rectangular matrix of strings."""
-    rows = table.get("rows", [])
-    matrix: List[List[str]] = []
-    max_cols = 0
-    for r in rows:
-        row_text = [c["text"] for c in r]
-        matrix.append(row_text)
-        max_cols = max(max_cols, len(row_text))
+    matrix = list(table.rows())
+    max_cols = max((len(r) for r in matrix), default=0)
 
     # Pad ragged rows so CSV columns align
     for r in matrix:
@@ -276,12 +629,18 @@ def main(argv: List[str]) -> int:
     ap.add_argument("-o", "--out", default="table.csv", help="Output CSV filename (default: table.csv)")
     ap.add_argument("--table", type=int, default=None, help="Force a specific table index (0-based).")
     ap.add_argument("--list", action="store_true", help="List tables found (index, caption, size) and exit.")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Report bytes on the wire vs decoded bytes.")
     args = ap.parse_args(argv)
 
-    html_text = read_html(args.source)
-    parser = TableHTMLParser()
-    parser.feed(html_text)
-    tables = parser.tables
+    # Listing needs only counts; otherwise only the best candidate keeps its rows
+    parser = TableScanParser() if args.list else BestTableParser(forced_index=args.table)
+    chunks = iter_html_chunks(args.source, verbose=args.verbose)
+    if args.list:
+        chunks = iter_table_tag_chunks(chunks)
+    for chunk in chunks:
+        parser.feed(chunk)
+    parser.close()
+    tables = parser.tables if args.list else parser.features
 
     if not tables:
         print("No <table> elements found. If the site uses JavaScript to load tables, download the rendered HTML and parse the file.", file=sys.stderr)
@@ -289,21 +648,19 @@ def main(argv: List[str]) -> int:
 
     if args.list:
         for i, t in enumerate(tables):
-            cap = t.get("caption") or ""
-            rows = len(t.get("rows") or [])
-            headers = table_headers(t)
-            cols_guess = len(headers) if headers else (len((t.get("rows") or [])[0]) if rows else 0)
-            cls = (t.get("attrs", {}).get("class") or "")
-            print(f"[{i}] rows={rows} cols≈{cols_guess} class='{cls}' caption='{cap[:120]}'")
+            cap = t.caption
+            cls = (t.attrs.get("class") or "")
+            print(f"[{i}] rows={t.rows} cols≈{t.first_row_cells} cells={t.cells} class='{cls}' caption='{cap[:120]}'")
         return 0
 
-    chosen_i = pick_table(tables, args.table)
-    chosen = tables[chosen_i]
+    chosen_i, chosen = parser.best_table()
+    if args.verbose:
+        print(f"Scored {len(tables)} tables; {parser.dropped} stopped keeping rows before they closed", file=sys.stderr)
 
     matrix = table_to_matrix(chosen)
     write_csv(matrix, args.out)
 
-    cap = chosen.get("caption") or ""
+    cap = chosen.caption
     print(f"Wrote table index {chosen_i} ({len(matrix)} rows) to: {args.out}")
     if cap:
         print(f"Caption: {cap}")
@@ -12,6 +12,8 @@ import sys
 import os
 import csv
 import re
+import codecs
+import zlib
 from html.parser import HTMLParser
 from urllib.request import urlopen
 from urllib.error import URLError
@@ -110,33 +112,124 @@ class TableParser(HTMLParser):
             self.current_cell += char
 
 
-def fetch_html_from_url(url):
+def make_decompressor(content_encoding, first_bytes):
     """
-    Fetch HTML content from a URL.
+    Create a zlib decompressor for a response's Content-Encoding.
+    
+    Args:
+        content_encoding (str): Value of the Content-Encoding header
+        first_bytes (bytes): First bytes of the body (used to tell zlib
+            wrapped deflate from raw deflate, which some servers send)
+        
+    Returns:
+        zlib decompressor, or None if the body is not compressed
+    """
+    encoding = (content_encoding or "").strip().lower()
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        if (len(first_bytes) >= 2 and first_bytes[0] & 0x0F == 8
+                and (first_bytes[0] << 8 | first_bytes[1]) % 31 == 0):
+            return zlib.decompressobj(zlib.MAX_WBITS)
+        return zlib.decompressobj(-zlib.MAX_WBITS)
+    return None
+
+
+def iter_url_chunks(url, chunk_size=64 * 1024):
+    """
+    Fetch HTML content from a URL piece by piece.
+    
+    Asks the server for a gzip/deflate compressed response and
+    decompresses it one network chunk at a time, so the compressed and
+    decompressed pages are never held in memory together.
     
     Args:
         url (str): The URL to fetch
+        chunk_size (int): Number of bytes to read from the network at once
         
     Returns:
-        str: The HTML content
+        iterator of str: Consecutive pieces of the HTML content
         
     Raises:
-        URLError: If the URL cannot be accessed
+        Exception: If the URL cannot be accessed
     """
     try:
         print(f"Fetching HTML from URL: {url}")
         # Create a request with a User-Agent header to avoid 403 Forbidden errors
         # Many websites (like Wikipedia) block requests without a proper User-Agent
         from urllib.request import Request
-        req = Request(url, headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'})
+        req = Request(url, headers={
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'Accept-Encoding': 'gzip, deflate',
+        })
         response = urlopen(req, timeout=10)
-        html_content = response.read().decode('utf-8', errors='ignore')
-        print(f"Successfully fetched {len(html_content)} characters from URL")
-        return html_content
     except URLError as e:
         raise Exception(f"Error fetching URL '{url}': {e}")
     except Exception as e:
         raise Exception(f"Unexpected error fetching URL '{url}': {e}")
+    return read_response_chunks(response, url, chunk_size)
+
+
+def read_response_chunks(response, url, chunk_size):
+    """
+    Decompress and decode an open HTTP response one chunk at a time.
+    
+    Args:
+        response: The response returned by urlopen
+        url (str): The URL being fetched (used in messages)
+        chunk_size (int): Number of bytes to read from the network at once
+        
+    Yields:
+        str: Consecutive pieces of the HTML content
+    """
+    content_encoding = response.headers.get('Content-Encoding') or 'identity'
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+    decompressor = None
+    wire_bytes = 0
+    decoded_bytes = 0
+    characters = 0
+    try:
+        with response:
+            while True:
+                data = response.read(chunk_size)
+                if not data:
+                    break
+                wire_bytes += len(data)
+                if decompressor is None:
+                    decompressor = make_decompressor(content_encoding, data)
+                if decompressor is not None:
+                    data = decompressor.decompress(data)
+                decoded_bytes += len(data)
+                text = decoder.decode(data)
+                characters += len(text)
+                yield text
+            if decompressor is not None:
+                data = decompressor.flush()
+                decoded_bytes += len(data)
+                text = decoder.decode(data, final=True)
+                characters += len(text)
+                yield text
+    except (URLError, OSError, zlib.error) as e:
+        raise Exception(f"Error fetching URL '{url}': {e}")
+    
+    print(f"Successfully fetched {characters} characters from URL")
+    print(f"  Transfer: {wire_bytes} bytes on the wire, {decoded_bytes} bytes decoded ({content_encoding})")
+
+
+def fetch_html_from_url(url):
+    """
+    Fetch HTML content from a URL.
+    
+    Args:
+        url (str): The URL to fetch
+        
+    Returns:
+        str: The HTML content
+        
+    Raises:
+        Exception: If the URL cannot be accessed
+    """
+    return "".join(iter_url_chunks(url))
 
 
 def read_html_from_file(filepath):
@@ -172,11 +265,13 @@ def get_html_content(input_source):
         input_source (str): Either a URL or file path
         
     Returns:
-        str: The HTML content
+        str or iterator of str: The HTML content; pages fetched from a URL
+        are returned as an iterator of chunks so they can be parsed while
+        they download
     """
     # Check if it's a URL (starts with http:// or https://)
     if input_source.startswith(('http://', 'https://')):
-        return fetch_html_from_url(input_source)
+        return iter_url_chunks(input_source)
     else:
         # Treat it as a file path
         return read_html_from_file(input_source)
@@ -187,17 +282,32 @@ def parse_tables(html_content):
     Parse HTML content and extract all tables.
     
     Args:
-        html_content (str): The HTML content to parse
+        html_content (str or iterable of str): The HTML content to parse,
+            either as one string or as consecutive chunks
         
     Returns:
         list: A list of tables, where each table is a list of rows,
               and each row is a list of cell values
     """
     parser = TableParser()
+    if isinstance(html_content, str):
+        html_content = [html_content]
+    # Errors raised while fetching the next chunk propagate to the caller;
+    # only errors from the parser itself are downgraded to a warning.
+    # As when the whole page was fed at once, a parser error ends the
+    # parse: the tables found so far are returned and the rest of the
+    # page is not read.
     try:
-        parser.feed(html_content)
-    except Exception as e:
-        print(f"Warning: Error while parsing HTML: {e}")
+        for chunk in html_content:
+            try:
+                parser.feed(chunk)
+            except Exception as e:
+                print(f"Warning: Error while parsing HTML: {e}")
+                break
+    finally:
+        # Closes the HTTP response of a download that stopped early
+        if hasattr(html_content, 'close'):
+            html_content.close()
     
     return parser.tables
 
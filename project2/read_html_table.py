@@ -1,5 +1,7 @@
 import sys
 import csv
+import codecs
+import io
 from html.parser import HTMLParser
 from urllib.request import urlopen, Request
 
@@ -13,6 +15,7 @@ class TableParser(HTMLParser):
         self.in_cell = False
 
         self.tables = []          # list of tables
+        self.done = False         # set once the first table is complete
         self.current_table = []   # current table
         self.current_row = []     # current row
         self.current_cell = ""    # current cell text
@@ -47,20 +50,30 @@ class TableParser(HTMLParser):
         elif tag == "table" and self.in_table:
             if self.current_table:
                 self.tables.append(self.current_table)
+                self.done = True
             self.in_table = False
 
 
-def read_html(source):
+def read_html_chunks(source, chunk_size=64 * 1024):
+    # Yield the page a piece at a time so we can stop reading early
+    decoder = codecs.getincrementaldecoder("utf-8")()
     if source.startswith("http://") or source.startswith("https://"):
         request = Request(
             source,
             headers={"User-Agent": "Mozilla/5.0"}
         )
-        with urlopen(request) as response:
-            return response.read().decode("utf-8")
+        stream = urlopen(request)
     else:
-        with open(source, "r", encoding="utf-8") as file:
-            return file.read()
+        stream = open(source, "rb")
+        # same newline handling as reading the file in text mode
+        decoder = io.IncrementalNewlineDecoder(decoder, translate=True)
+    with stream:
+        while True:
+            data = stream.read(chunk_size)
+            if not data:
+                break
+            yield decoder.decode(data)
+    yield decoder.decode(b"", final=True)
 
 
 def main():
@@ -70,10 +83,14 @@ def main():
 
     source = sys.argv[1]
 
-    html_content = read_html(source)
-
+    # Only the first table is written, so stop downloading/parsing once it is complete
     parser = TableParser()
-    parser.feed(html_content)
+    chunks = read_html_chunks(source)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    chunks.close()
 
     if not parser.tables:
         print("No tables found.")
@@ -3,126 +3,3266 @@
 read_html_table.py
 
 Usage:
-    python read_html_table.py <URL|FILENAME>
+    python read_html_table.py [--stream | --pipeline] [--chunk-size N] <URL|FILENAME>
+    python read_html_table.py [--jobs N] [--out-dir DIR] [--sources-from FILE|-] [SOURCE ...]
+    python read_html_table.py [--fetch-workers N] [--per-host N] SOURCE ...
+    python read_html_table.py [--stats[=json]] <URL|FILENAME>
+    python read_html_table.py --list [--select SELECTOR] <URL|FILENAME> ...
+    python read_html_table.py --revisions FILE [--delta] <URL|FILENAME> ...
 
 Reads all HTML <table> elements from the given web page or local HTML file
 and writes CSV files:
     table_0.csv, table_1.csv, ...
+numbered in the order their <table> tags appear. A table nested inside a
+cell is written as a table of its own.
+
+With --stream the page is read and parsed in fixed-size chunks and every
+completed <tr> is written to its table's CSV file straight away, so peak
+memory depends on the widest row rather than on the size of the page.
+--pipeline does the same, but hands the rows to a background thread
+through a bounded queue; it writes them in batches with writerows() into
+large file buffers, so disk writes overlap with parsing.
+
+--sink KIND[:PATH] sends the rows somewhere else than table_N.csv; with
+several --sink options one parse fills all of them. The sinks are csv
+(table_N.csv files in a directory), jsonl (one JSON object per row) and
+sqlite (a table_N table per HTML table, filled with executemany() in
+large transactions).
+
+--manifest FILE makes repeated runs incremental. The SQLite file records
+a SHA-256 of every page body and of the rows of every table written. A
+page whose body and options are unchanged is not parsed again. A table
+with unchanged rows is not rewritten; the others are written to a
+temporary file and renamed over table_N.csv.
+
+--revisions FILE keeps the history of every table in SQLite (see
+RevisionStore): a base snapshot, then per run only the rows added,
+removed or changed, so the file grows with the amount of change rather
+than with the number of runs. Runs with other --engine, --expand-spans,
+--columns, --where or --select options keep separate histories. With
+--delta the run writes only those rows, to table_N.delta.csv, each
+prefixed with +, - or ~.
+
+Given several sources (or --sources-from a file, "-" for stdin) the pages
+are extracted in parallel by a process pool. Source number i of the list
+is written to <out-dir>/<i>_<name>/table_N.csv, so output names do not
+depend on the order in which the workers finish. With --fetch-workers the
+URLs of a batch are downloaded by a thread pool that reuses keep-alive
+connections per host, and the bodies are handed to the parsing processes
+through a bounded queue.
+
+--cache-dir keeps downloaded pages on disk. Repeat requests for a URL send
+If-None-Match / If-Modified-Since and reuse the stored body on a 304; the
+cache is trimmed least-recently-used first to --cache-max-mb.
+
+Pages are requested with Accept-Encoding: gzip, deflate and decompressed
+chunk by chunk as they are parsed; -v reports the bytes received on the
+wire and the decoded size of every download.
+
+For local files, --prescan memory-maps the file and finds the <table> ...
+</table> regions with a byte-level scan (skipping comments, scripts and
+styles); only those regions are decoded and parsed.
+
+--engine NAME parses with another registered table extractor (see
+--list-engines); table_engines.py provides the extractors written
+elsewhere in this repository. All of them produce the same table_N.csv
+output, so they can be compared and benchmarked side by side.
+
+--expand-spans places a cell with rowspan/colspan in every row and column
+it covers, so the CSV columns line up with the table as it is displayed.
+
+--columns Language,Year,3 keeps only those columns, by header name (as in
+the first row of each table) or 0-based index. Once the header row is
+read, the text of the other cells is never collected.
+
+--where "Imperative == Yes and Standardized != No" keeps only the rows
+that match (see RowFilter); the first row of each table is kept as its
+header. Rows are tested as their </tr> closes, before they are stored or
+written.
+
+--select "table.wikitable" keeps only the tables that match a selector
+(see TableSelector): classes and id of the <table> tag, and words of its
+caption. Tables that do not match, such as navboxes and layout tables,
+are skipped without collecting their rows; the matching tables are
+numbered table_0.csv, table_1.csv, ... in order.
+
+--max-tables N keeps the first N tables and --table INDEX only table
+INDEX (counting only matching tables with --select). Parsing stops and
+the download or file is closed as soon as those tables are complete;
+--stats reports the bytes left unread.
+
+Cell values repeated across a page ("Yes", "No", years) are shared
+through a bounded CellPool while tables are held in memory;
+bench_cell_pool.py measures how much memory that saves.
+
+--stats prints wall and CPU time per phase (network or file read,
+decoding, parsing, cell normalisation, CSV writing) and counters for
+bytes read, tags, tables, rows, cells and bytes written to stderr;
+--stats=json prints the same as one JSON object. Without --stats none of
+this bookkeeping runs.
+
+--list prints the row, column and cell counts, class, id and caption of
+every table instead of writing CSV files. Only tags are counted and no
+cell text is collected, so listing a page costs a fraction of
+extracting it.
+
+Other scripts can import iter_tables() to consume tables and their rows
+lazily while the rest of the page is still being parsed.
+serve_html_table.py serves the same extraction over HTTP from worker
+processes that stay loaded between requests. check_read_html_table.py
+checks the parser and the fetch layer against a local http.server.
 
 Only Python standard libraries are used (no external packages).
 """
 
+import abc
+import argparse
+import codecs
+import collections
+import contextlib
+import hashlib
+import http.client
+import importlib
+import io
+import itertools
+import json
+import mmap
+import operator
+import os
+import queue
+import re
+import shlex
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+import urllib.error
 import urllib.request
 import sys
 import csv
 import html
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from html.parser import HTMLParser
-from urllib.parse import urlparse
+from urllib.parse import urljoin, urlparse
 from urllib.request import urlopen
 
 
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MAX_REDIRECTS = 5
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+ACCEPT_ENCODING = "gzip, deflate"
+DEFAULT_CELL_POOL_SIZE = 4096     # distinct cell values kept by a CellPool
+CELL_POOL_MAX_LENGTH = 64         # longer cell values are not pooled
+MAX_ROWSPAN = 65534               # the limits browsers apply to rowspan/colspan
+MAX_COLSPAN = 1000
+WRITE_BATCH_ROWS = 512           # --pipeline: rows per message to the writer thread
+WRITE_QUEUE_SIZE = 64            # --pipeline: row batches in flight before the parser waits
+WRITE_BUFFER_SIZE = 1024 * 1024  # --pipeline: buffer of each CSV file
+SQLITE_BATCH_ROWS = 1000         # rows per executemany() of the sqlite sink
+SQLITE_COMMIT_ROWS = 100000      # rows per transaction of the sqlite sink
+STATS_FORMATS = ("text", "json")  # --stats report formats, the default first
+
+
+class CellPool:
+    """
+    Bounded pool of cell strings, so that a value repeated all over a page
+    ("Yes", "No", "", "1995") is kept in memory once however many cells
+    hold it.
+
+    Strings longer than max_length are returned as they are. Beyond
+    max_size entries the least recently used one is dropped, so a column
+    of unique values cannot grow the pool without bound.
+    """
+
+    def __init__(self, max_size=DEFAULT_CELL_POOL_SIZE, max_length=CELL_POOL_MAX_LENGTH):
+        self.max_size = max_size
+        self.max_length = max_length
+        self._pool = collections.OrderedDict()
+
+    def intern(self, text):
+        if len(text) > self.max_length:
+            return text
+        pool = self._pool
+        cached = pool.get(text)
+        if cached is not None:
+            pool.move_to_end(text)
+            return cached
+        pool[text] = text
+        if len(pool) > self.max_size:
+            pool.popitem(last=False)
+        return text
+
+    def __len__(self):
+        return len(self._pool)
+
+
+def cell_spans(attrs):
+    """(rowspan, colspan) of a <td>/<th>, clamped the way browsers clamp them."""
+    rowspan = colspan = 1
+    for name, value in attrs:
+        if name in ("rowspan", "colspan"):
+            try:
+                n = int((value or "").strip())
+            except ValueError:
+                continue
+            if name == "rowspan":
+                # rowspan="0" spans the rest of the table
+                rowspan = MAX_ROWSPAN if n == 0 else min(max(n, 1), MAX_ROWSPAN)
+            else:
+                colspan = min(max(n, 1), MAX_COLSPAN)
+    return rowspan, colspan
+
+
+class SpanGrid:
+    """
+    Expands rowspan/colspan into grid rows, one <tr> at a time.
+
+    pending[c] holds [rows still covered, text] for a cell of an earlier
+    row that spans down into column c. Each row is built by walking its
+    cells and the pending array once, so earlier rows are never revisited
+    and a table costs O(cells of the expanded grid). A spanned cell's text
+    is repeated in every grid position it covers.
+    """
+
+    def __init__(self):
+        self.pending = []
+
+    def expand(self, cells, spans):
+        pending = self.pending
+        row = []
+        col = 0
+        for text, (rowspan, colspan) in zip(cells, spans):
+            # Skip the positions taken by cells spanning down from above.
+            while col < len(pending) and pending[col] is not None:
+                row.append(self._take(col))
+                col += 1
+            for _ in range(colspan):
+                row.append(text)
+                if rowspan > 1:
+                    if col >= len(pending):
+                        pending.extend([None] * (col + 1 - len(pending)))
+                    pending[col] = [rowspan - 1, text]
+                col += 1
+        end = len(row)
+        while col < len(pending):
+            if pending[col] is None:
+                row.append("")
+            else:
+                row.append(self._take(col))
+                end = len(row)
+            col += 1
+        del row[end:]
+        return row
+
+    def _take(self, col):
+        span = self.pending[col]
+        span[0] -= 1
+        if not span[0]:
+            self.pending[col] = None
+        return span[1]
+
+
+def parse_columns(text):
+    """
+    Parse a --columns value such as "Language,Year,3" into a list of
+    header names (str) and 0-based column indexes (int).
+    """
+    columns = []
+    for item in text.split(","):
+        item = item.strip()
+        if item:
+            columns.append(int(item) if item.isdigit() else item)
+    if not columns:
+        raise ValueError("no columns given")
+    return columns
+
+
+def resolve_columns(columns, header):
+    """
+    Column indexes for a projection, resolving names against a header row
+    (case-insensitively). A name missing from the header resolves to -1,
+    which selects an empty cell.
+    """
+    names = {}
+    for i, text in enumerate(header):
+        names.setdefault(text.lower(), i)
+    return [c if isinstance(c, int) else names.get(c.lower(), -1) for c in columns]
+
+
+WHERE_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<op>==|!=|~=|<=|>=|<|>)
+      | (?P<paren>[()])
+      | (?P<word>[^\s()"'<>=!~]+)
+    )""", re.VERBOSE)
+
+_WHERE_KEYWORDS = ("and", "or", "not")
+
+
+class RowFilter:
+    """
+    A --where expression, parsed once and then bound to each table's header.
+
+        Imperative == Yes and Standardized != No
+        "Original purpose" ~= web or not (Year < 1990)
+
+    A comparison is COLUMN OP VALUE. COLUMN is a header name (matched
+    case-insensitively) or a 0-based index; names and values are bare
+    words, joined by single spaces, or quoted strings. The operators are
+    == and != (exact text), ~= (contains, ignoring case) and < <= > >=
+    (numeric when VALUE is a number, in which case cells that are not
+    numbers never match; text otherwise). Comparisons combine with not,
+    and, or and parentheses. A column a table lacks reads as "".
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self._tokens = self._tokenize(text)
+        self._pos = 0
+        self.columns = []          # column specs in the order they appear
+        self._tree = self._parse_or()
+        if self._pos != len(self._tokens):
+            raise ValueError(f"unexpected {self._tokens[self._pos][1]!r} in --where expression")
+        del self._tokens
+
+    @staticmethod
+    def _tokenize(text):
+        tokens = []
+        pos = 0
+        text = text.rstrip()
+        while pos < len(text):
+            m = WHERE_TOKEN_RE.match(text, pos)
+            if not m or m.end() == pos:
+                raise ValueError(f"cannot parse --where expression at {text[pos:]!r}")
+            kind = m.lastgroup
+            value = m.group(kind)
+            if kind == "string":
+                value = re.sub(r"\\(.)", r"\1", value[1:-1])
+            elif kind == "word" and value.lower() in _WHERE_KEYWORDS:
+                kind, value = "keyword", value.lower()
+            tokens.append((kind, value))
+            pos = m.end()
+        return tokens
+
+    def _peek(self):
+        return self._tokens[self._pos] if self._pos < len(self._tokens) else (None, None)
+
+    def _next(self, kind, what):
+        token = self._peek()
+        if token[0] != kind:
+            found = repr(token[1]) if token[1] is not None else "end of expression"
+            raise ValueError(f"expected {what} in --where expression, found {found}")
+        self._pos += 1
+        return token[1]
+
+    def _parse_or(self):
+        node = self._parse_and()
+        while self._peek() == ("keyword", "or"):
+            self._pos += 1
+            node = ("or", node, self._parse_and())
+        return node
+
+    def _parse_and(self):
+        node = self._parse_not()
+        while self._peek() == ("keyword", "and"):
+            self._pos += 1
+            node = ("and", node, self._parse_not())
+        return node
+
+    def _parse_not(self):
+        token = self._peek()
+        if token == ("keyword", "not"):
+            self._pos += 1
+            return ("not", self._parse_not())
+        if token == ("paren", "("):
+            self._pos += 1
+            node = self._parse_or()
+            self._next("paren", "')'")
+            return node
+        column = self._operand("a column")
+        op = self._next("op", "a comparison operator")
+        value = self._operand("a value")
+        self.columns.append(int(column) if column.isdigit() else column)
+        return ("cmp", len(self.columns) - 1, op, value)
+
+    def _operand(self, what):
+        kind, value = self._peek()
+        if kind == "string":
+            self._pos += 1
+            return value
+        words = []
+        while self._peek()[0] == "word":
+            words.append(self._next("word", what))
+        if not words:
+            self._next("word", what)
+        return " ".join(words)
+
+    def bind(self, header, cells_by_index=False):
+        """
+        Return predicate(cells) -> bool for a table whose first row is
+        header. cells is the row as a list, or with cells_by_index a dict
+        {column index: text} of the cells that were collected.
+        """
+        if cells_by_index:
+            def cell(cells, i):
+                return cells.get(i, "")
+        else:
+            def cell(cells, i):
+                return cells[i] if 0 <= i < len(cells) else ""
+        return self._bind(self._tree, resolve_columns(self.columns, header), cell)
+
+    def _bind(self, node, indexes, cell):
+        kind = node[0]
+        if kind == "not":
+            operand = self._bind(node[1], indexes, cell)
+            return lambda cells: not operand(cells)
+        if kind in ("and", "or"):
+            left = self._bind(node[1], indexes, cell)
+            right = self._bind(node[2], indexes, cell)
+            if kind == "and":
+                return lambda cells: left(cells) and right(cells)
+            return lambda cells: left(cells) or right(cells)
+        _, position, op, value = node
+        i = indexes[position]
+        if op == "==":
+            return lambda cells: cell(cells, i) == value
+        if op == "!=":
+            return lambda cells: cell(cells, i) != value
+        if op == "~=":
+            needle = value.lower()
+            return lambda cells: needle in cell(cells, i).lower()
+        compare = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}[op]
+        number = _as_number(value)
+        if number is None:
+            return lambda cells: compare(cell(cells, i), value)
+
+        def numeric(cells):
+            n = _as_number(cell(cells, i))
+            return n is not None and compare(n, number)
+        return numeric
+
+
+def _as_number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+SELECTOR_TERM_RE = re.compile(r"(?P<tag>table)?(?P<rest>(?:[.#][^.#\s]+)*)$", re.IGNORECASE)
+
+
+class TableSelector:
+    """
+    A --select expression, checked against each <table> start tag.
+
+        table.wikitable                 class "wikitable"
+        #languages                      id "languages"
+        .wikitable.sortable             both classes
+        caption~=language               caption contains "language" (any case)
+        .wikitable caption~="release"   every term must match
+        #languages, table.wikitable     either alternative may match
+
+    Class and id terms are decided on the tag's own attributes. A table
+    whose attributes match but that also needs a caption term is decided
+    when its <caption> closes, or as "no caption" at the first other tag
+    (the caption must be the first child of a table).
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.alternatives = []     # (classes, id or None, caption needles) per alternative
+        lexer = shlex.shlex(text, posix=True, punctuation_chars=",")
+        lexer.commenters = ""
+        lexer.whitespace_split = True
+        terms = []
+        try:
+            for token in itertools.chain(lexer, [","]):
+                if token == ",":
+                    if not terms:
+                        raise ValueError("empty alternative")
+                    self.alternatives.append(self._compile(terms))
+                    terms = []
+                else:
+                    terms.append(token)
+        except ValueError as e:
+            raise ValueError(f"cannot parse --select expression {text!r}: {e}") from None
+
+    @staticmethod
+    def _compile(terms):
+        classes, table_id, captions = set(), None, []
+        for term in terms:
+            if term.lower().startswith("caption~="):
+                needle = term[len("caption~="):].lower()
+                if not needle:
+                    raise ValueError("caption~= needs a value")
+                captions.append(needle)
+                continue
+            m = SELECTOR_TERM_RE.match(term)
+            if not m or not (m.group("tag") or m.group("rest")):
+                raise ValueError(f"unknown term {term!r}")
+            for part in re.findall(r"[.#][^.#]+", m.group("rest")):
+                if part[0] == ".":
+                    classes.add(part[1:])
+                elif table_id is not None and table_id != part[1:]:
+                    raise ValueError(f"two ids in {term!r}")
+                else:
+                    table_id = part[1:]
+        return classes, table_id, captions
+
+    def match_tag(self, attrs):
+        """
+        Check a <table> tag's attributes: True or False when that decides
+        it, otherwise the caption needles of the alternatives still open
+        (pass them to match_caption()).
+        """
+        classes, table_id = set(), None
+        for name, value in attrs:
+            if name == "class" and value:
+                classes.update(value.split())
+            elif name == "id":
+                table_id = value
+        pending = []
+        for want_classes, want_id, captions in self.alternatives:
+            if want_classes <= classes and (want_id is None or want_id == table_id):
+                if not captions:
+                    return True
+                pending.append(captions)
+        return pending or False
+
+    @staticmethod
+    def match_caption(pending, caption):
+        """True if the caption text satisfies one of the alternatives from match_tag()."""
+        caption = caption.lower()
+        return any(all(needle in caption for needle in captions) for captions in pending)
+
+
+class _TableFrame:
+    """Row and cell state of one open <table>; nested tables each get their own."""
+
+    __slots__ = ("index", "discard", "table", "in_row", "in_cell", "collect", "row", "cell",
+                 "spans", "cell_span", "grid", "col", "header_seen", "order", "keep", "picked",
+                 "predicate", "pending", "resume_skip")
+
+    def __init__(self, index, grid=None):
+        self.index = index        # position of the <table> tag in the document
+        self.discard = False      # parsed for its nesting only; no hooks are called
+        self.table = None         # whatever the start_table() hook keeps for this table
+        self.in_row = False
+        self.in_cell = False      # inside a <td>/<th> (or a caption being matched)
+        self.collect = False      # collecting that cell's text; not for projected-out cells
+        self.row = []
+        self.cell = []
+        self.spans = []
+        self.cell_span = (1, 1)
+        self.grid = grid
+        self.col = 0              # index of the next cell in the row
+        self.header_seen = False  # the first row resolves columns and is never filtered
+        self.order = None         # projected column indexes, once resolved
+        self.keep = None          # column indexes collected when the others are skipped
+        self.picked = {}          # column index -> text of the collected cells
+        self.predicate = None     # RowFilter bound to this table's header
+        self.pending = None       # caption needles while a selector waits for the caption
+        self.resume_skip = 0      # skip depth to return to when the table closes
+
+
 class TableHTMLParser(HTMLParser):
     """
     Simple HTML table parser using only the standard library.
 
-    - Collects all <table> elements found in the HTML.
+    - Collects all <table> elements found in the HTML, in the order their
+      <table> tags appear.
     - Each table is represented as a list of rows.
     - Each row is a list of cell strings (from <th> or <td>).
+    - A table nested inside a cell is a table of its own; the cell that
+      holds it keeps only its own text. Every open table has its own
+      _TableFrame on a stack, so the outer table carries on where it was
+      when the inner one closes.
+    - Repeated cell values share one str through a CellPool, unless
+      intern_cells is False.
+    - With expand_spans, rowspan/colspan are expanded through a SpanGrid so
+      that every cell lands in its grid column; the tables kept in
+      self.tables are padded to their widest row.
+    - With columns (see parse_columns()), rows hold only those columns, in
+      that order. Names are resolved against the first row of each table.
+      From then on the text of cells outside the projection is never
+      collected (with expand_spans, rows are projected after expansion).
+    - With where (a RowFilter), rows after the first one of each table are
+      tested as their </tr> closes; rows that fail are never passed to
+      add_row(), so they are neither stored nor written.
+    - With max_tables N only the first N tables are kept, and with
+      table_index only that one. The other tables are parsed (they may
+      hold the wanted ones) but no hooks are called for them. Once the
+      wanted tables have closed, self.done is set: the caller should stop
+      feeding, and close() does not parse what is still buffered.
+    - With select (a TableSelector) only matching tables are kept and
+      numbered; max_tables and table_index count matching tables. A table
+      that does not match is skipped: until its </table> the parser only
+      counts nested <table> tags, and collects no rows or cells. A nested
+      table that matches is still extracted.
+
+    Subclasses can override start_table(), add_row() and end_table() to
+    consume rows as they are parsed instead of collecting them in self.tables.
+    The hooks always refer to the innermost open table, and calls for
+    nested tables are properly nested: start_table() of an inner table
+    comes after the outer one's and its end_table() before.
     """
 
-    def __init__(self):
+    def __init__(self, intern_cells=True, expand_spans=False, columns=None, where=None,
+                 max_tables=None, table_index=None, select=None):
         super().__init__()
         self.tables = []          # list of tables; each is list[list[str]]
-        self._in_table = False
-        self._in_row = False
-        self._in_cell = False
-        self._current_table = []
-        self._current_row = []
-        self._current_cell = []
+        self.cell_pool = CellPool() if intern_cells else None
+        self.expand_spans = expand_spans
+        self.columns = columns
+        self.where = where
+        self._selective = columns is not None or where is not None
+        # Projections by index alone need no header row to skip cells from the start.
+        self._fixed_order = None
+        if columns is not None and all(isinstance(c, int) for c in columns + self._where_columns()):
+            self._fixed_order = list(columns)
+        self.max_tables = max_tables
+        self.table_index = table_index
+        self._wanted = 1 if table_index is not None else max_tables
+        self.select = select
+        self._skip_depth = 0      # open tables inside the table being skipped, itself included
+        self._tables_seen = 0     # <table> tags so far (matching ones, with select)
+        self._tables_done = 0     # kept tables that have closed
+        self.done = False
+        self._stack = []          # one _TableFrame per open <table>, innermost last
+        self._frame = None        # self._stack[-1], or None outside tables
 
     def handle_starttag(self, tag, attrs):
         tag = tag.lower()
+        if self._skip_depth:
+            if tag == "table":
+                verdict = self.select.match_tag(attrs)
+                if verdict is False:
+                    self._skip_depth += 1
+                else:
+                    self._open_table(verdict, self._skip_depth)
+            return
+        frame = self._frame
+        if frame is not None and frame.pending is not None and not frame.in_cell and tag != "caption":
+            # The table has no caption
+            if not self._decide(frame, ""):
+                if tag == "table":
+                    self._skip_depth += 1
+                return
         if tag == "table":
-            # Start a new table
-            self._in_table = True
-            self._current_table = []
-        elif tag == "tr" and self._in_table:
+            if frame is not None and not frame.in_cell:
+                # A <table> that is not inside a cell closes the open one,
+                # as browsers do.
+                self._close_table()
+            verdict = True if self.select is None else self.select.match_tag(attrs)
+            if verdict is False:
+                self._skip_table()
+            else:
+                self._open_table(verdict)
+        elif frame is None:
+            return
+        elif tag == "caption" and frame.pending is not None:
+            frame.in_cell = frame.collect = True
+            frame.cell = []
+        elif tag == "tr":
             # Start a new row in the current table
-            self._in_row = True
-            self._current_row = []
-        elif tag in ("td", "th") and self._in_row:
+            frame.in_row = True
+            frame.row = []
+            frame.spans = []
+            frame.col = 0
+            if frame.keep is not None:
+                frame.picked = {}
+        elif tag in ("td", "th") and frame.in_row:
             # Start a new cell in the current row
-            self._in_cell = True
-            self._current_cell = []
+            frame.col += 1
+            frame.in_cell = True
+            if frame.keep is not None and frame.col - 1 not in frame.keep:
+                # Outside the projection: its text is never collected.
+                frame.collect = False
+                return
+            frame.collect = True
+            frame.cell = []
+            if frame.grid is not None:
+                frame.cell_span = cell_spans(attrs)
 
     def handle_endtag(self, tag):
         tag = tag.lower()
-        if tag in ("td", "th") and self._in_cell:
+        if self._skip_depth:
+            if tag == "table":
+                self._end_skipped_table()
+            return
+        frame = self._frame
+        if frame is None:
+            return
+        if frame.pending is not None:
+            if tag == "caption" and frame.in_cell:
+                frame.in_cell = frame.collect = False
+                self._decide(frame, html.unescape("".join(frame.cell)).strip())
+                return
+            if tag != "table":
+                return
+            # An empty table without a caption
+            if not self._decide(frame, ""):
+                self._end_skipped_table()
+                return
+        if tag in ("td", "th") and frame.in_cell:
+            if frame.discard or not frame.collect:
+                frame.in_cell = frame.collect = False
+                return
             # Finish current cell
-            text = "".join(self._current_cell).strip()
+            text = "".join(frame.cell).strip()
             text = html.unescape(text)
-            self._current_row.append(text)
-            self._in_cell = False
-        elif tag == "tr" and self._in_row:
+            if self.cell_pool is not None:
+                text = self.cell_pool.intern(text)
+            if frame.keep is not None:
+                frame.picked[frame.col - 1] = text
+            else:
+                frame.row.append(text)
+            if frame.grid is not None:
+                frame.spans.append(frame.cell_span)
+            frame.in_cell = frame.collect = False
+        elif tag == "tr" and frame.in_row:
             # Finish current row
-            self._current_table.append(self._current_row)
-            self._in_row = False
-        elif tag == "table" and self._in_table:
-            # Finish current table
-            self.tables.append(self._current_table)
-            self._in_table = False
+            frame.in_row = False
+            if frame.discard:
+                return
+            row = frame.row
+            if frame.grid is not None:
+                row = frame.grid.expand(row, frame.spans)
+            if self._selective:
+                row = self._select(frame, row)
+                if row is None:
+                    return
+            self.add_row(row)
+        elif tag == "table":
+            # Finish current table and return to the one around it
+            self._close_table()
 
     def handle_data(self, data):
-        if self._in_cell:
-            self._current_cell.append(data)
+        frame = self._frame
+        if frame is not None and frame.collect:
+            frame.cell.append(data)
+
+    def _where_columns(self):
+        return self.where.columns if self.where is not None else []
+
+    def _resolve(self, frame, header):
+        """Resolve --columns and --where against a table's header row."""
+        if self.columns is not None:
+            frame.order = resolve_columns(self.columns, header)
+            if frame.grid is None:
+                frame.keep = set(frame.order) | set(resolve_columns(self._where_columns(), header))
+        if self.where is not None:
+            frame.predicate = self.where.bind(header, cells_by_index=frame.keep is not None)
+
+    def _select(self, frame, row):
+        """Apply --where and --columns to a finished row; None drops it."""
+        by_index = frame.keep is not None   # cells were collected into frame.picked
+        if not frame.header_seen:
+            frame.header_seen = True
+            if frame.order is None and frame.predicate is None:
+                # First row of the table: resolve the column names against it.
+                self._resolve(frame, row)
+        elif frame.predicate is not None:
+            if not frame.predicate(frame.picked if by_index else row):
+                return None
+        if frame.order is None:
+            return row
+        if by_index:
+            return [frame.picked.get(c, "") for c in frame.order]
+        n = len(row)
+        return [row[c] if 0 <= c < n else "" for c in frame.order]
+
+    def _open_table(self, verdict, resume_skip=0):
+        # Start a new table; verdict is True or the caption needles it waits for
+        frame = _TableFrame(None, SpanGrid() if self.expand_spans else None)
+        frame.resume_skip = resume_skip
+        self._skip_depth = 0
+        self._frame = frame
+        self._stack.append(frame)
+        if verdict is True:
+            self._begin_table(frame)
+        else:
+            frame.pending = verdict
+
+    def _begin_table(self, frame):
+        frame.index = self._tables_seen
+        self._tables_seen += 1
+        if self._fixed_order is not None:
+            self._resolve(frame, [])
+        if self._wanted is not None and not self._is_wanted(frame.index):
+            frame.discard = True
+        else:
+            self.start_table()
+
+    def _decide(self, frame, caption):
+        """Settle a table waiting for its caption; False if it is skipped after all."""
+        if self.select.match_caption(frame.pending, caption):
+            frame.pending = None
+            self._begin_table(frame)
+            return True
+        self._stack.pop()
+        self._skip_table(frame.resume_skip)
+        return False
+
+    def _skip_table(self, depth=0):
+        self._skip_depth = depth + 1
+        self._frame = None
+
+    def _end_skipped_table(self):
+        self._skip_depth -= 1
+        if not self._skip_depth:
+            self._frame = self._stack[-1] if self._stack else None
+
+    def _is_wanted(self, index):
+        if self.table_index is not None:
+            return index == self.table_index
+        return index < self.max_tables
 
+    def _close_table(self):
+        if not self._frame.discard:
+            self.end_table()
+            self._tables_done += 1
+            if self._tables_done == self._wanted:
+                self.done = True
+        frame = self._stack.pop()
+        if frame.resume_skip:
+            # Back inside the skipped table around this one
+            self._skip_table(frame.resume_skip - 1)
+        else:
+            self._frame = self._stack[-1] if self._stack else None
 
-def load_html(source: str) -> str:
+    def close(self):
+        if not self.done:
+            super().close()
+
+    def start_table(self):
+        """Called when a <table> opens."""
+        self._frame.table = []
+        self.tables.append(self._frame.table)
+
+    def add_row(self, row):
+        """Called with the list of cell strings each time a </tr> closes."""
+        self._frame.table.append(row)
+
+    def end_table(self):
+        """Called when a </table> closes."""
+        if self.expand_spans:
+            table = self._frame.table
+            width = max((len(row) for row in table), default=0)
+            for row in table:
+                row.extend([""] * (width - len(row)))
+
+
+class TableCSVFiles:
     """
-    Load HTML content from a URL or a local file path.
-    Adds browser User-Agent to bypass Wikipedia blocks.
+    The table_N.csv files in out_dir that rows are being written to, by
+    table index. A nested table's file is open at the same time as the
+    outer one's. close_all() is for the end of the page: a table whose
+    </table> never came is kept with the rows written so far, as the
+    parsers that hold tables in memory keep it. bytes_written counts the
+    bytes of the files closed.
     """
-    parsed = urlparse(source)
-    if parsed.scheme in ("http", "https"):
-        req = urllib.request.Request(source)
-        req.add_header('User-Agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
-        with urllib.request.urlopen(req) as resp:
-            charset = resp.headers.get_content_charset() or "utf-8"
-            return resp.read().decode(charset, errors="replace")
-    else:
-        with open(source, "r", encoding="utf-8", errors="replace") as f:
-            return f.read()
 
+    def __init__(self, out_dir="", verbose=True, buffering=-1):
+        self.out_dir = out_dir
+        self.verbose = verbose
+        self.buffering = buffering
+        self.bytes_written = 0
+        self._files = {}          # table index -> (file, writer, filename)
+
+    def open(self, index):
+        filename = os.path.join(self.out_dir, f"table_{index}.csv")
+        f = open(filename, "w", newline="", encoding="utf-8", buffering=self.buffering)
+        self._files[index] = (f, csv.writer(f), filename)
+
+    def writer(self, index):
+        """csv.writer of the open file of table index."""
+        return self._files[index][1]
 
-def write_tables_to_csv(tables):
+    def close(self, index):
+        f, _, filename = self._files.pop(index)
+        self.bytes_written += f.tell()
+        f.close()
+        if self.verbose:
+            print(f"Wrote {filename}")
+
+    def close_all(self):
+        """Close the files still open, innermost table first."""
+        for index in reversed(list(self._files)):
+            self.close(index)
+
+
+class StreamingCSVParser(TableHTMLParser):
     """
-    Write each table to a CSV file: table_0.csv, table_1.csv, ...
+    TableHTMLParser that writes rows to table_0.csv, table_1.csv, ... in
+    out_dir as soon as they are parsed instead of keeping the tables in memory.
     """
-    for idx, table in enumerate(tables):
-        filename = f"table_{idx}.csv"
-        with open(filename, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            for row in table:
-                writer.writerow(row)
-        print(f"Wrote {filename}")
 
+    def __init__(self, out_dir="", verbose=True, **parse_options):
+        super().__init__(intern_cells=False, **parse_options)  # rows are written, not kept
+        self.files = TableCSVFiles(out_dir, verbose)
+        self.table_count = 0
 
-def main():
-    if len(sys.argv) != 2:
-        print("Usage: python read_html_table.py <URL|FILENAME>")
-        sys.exit(1)
+    def start_table(self):
+        self.table_count += 1
+        self.files.open(self._frame.index)
 
-    source = sys.argv[1]
-    html_text = load_html(source)
+    def add_row(self, row):
+        self.files.writer(self._frame.index).writerow(row)
 
-    parser = TableHTMLParser()
-    parser.feed(html_text)
+    def end_table(self):
+        self.files.close(self._frame.index)
 
-    if not parser.tables:
-        print("No <table> elements found.")
-        sys.exit(0)
+    def close(self):
+        super().close()
+        self.files.close_all()
+
+
+LIST_SCAN_RE = re.compile(r"<(?:(?P<open>!--|script\b|style\b|caption\b)|/?(?:table|tr|td|th)\b)",
+                          re.IGNORECASE)
+_LIST_SCAN_ENDS = {
+    "!--": re.compile(r"-->"),
+    "script": re.compile(r"</script", re.IGNORECASE),
+    "style": re.compile(r"</style", re.IGNORECASE),
+    "caption": re.compile(r"</caption", re.IGNORECASE),
+}
+
+
+def iter_table_tag_chunks(chunks):
+    """
+    Filter decoded HTML chunks down to what TableSummaryParser needs: the
+    <table>, <tr>, <td> and <th> tags and whole <caption> elements.
+    Comments, scripts and styles are dropped, and so is all other markup
+    and text, which the HTML parser then never has to tokenize.
+    """
+    buf = ""
+    for chunk in chunks:
+        buf += chunk
+        out = []
+        pos = 0
+        while True:
+            m = LIST_SCAN_RE.search(buf, pos)
+            if m is None:
+                # Keep enough of the tail for a tag name split across chunks
+                pos = max(pos, len(buf) - 16)
+                break
+            opener = m.group("open")
+            end = m.end()
+            if opener is not None:
+                close = _LIST_SCAN_ENDS[opener.lower()].search(buf, end)
+                end = close.start() if close else -1
+            if end != -1:
+                end = buf.find(">", end)
+            if end == -1:
+                pos = m.start()       # not complete yet: wait for the next chunk
+                break
+            if opener is None or opener.lower() == "caption":
+                out.append(buf[m.start():end + 1])
+            pos = end + 1
+        buf = buf[pos:]
+        if out:
+            yield "".join(out)
+
+
+class TableSummary:
+    """What --list reports about one table."""
+
+    __slots__ = ("index", "attrs", "caption", "rows", "cells", "columns")
+
+    def __init__(self, index, attrs):
+        self.index = index
+        self.attrs = attrs        # attributes of the <table> tag
+        self.caption = ""
+        self.rows = 0
+        self.cells = 0
+        self.columns = 0          # cells in the widest row
+
+    def describe(self):
+        return (f"[{self.index}] rows={self.rows} cols={self.columns} cells={self.cells} "
+                f"class='{self.attrs.get('class') or ''}' id='{self.attrs.get('id') or ''}' "
+                f"caption='{self.caption[:120]}'")
+
+
+class TableSummaryParser(TableHTMLParser):
+    """
+    Metadata-only TableHTMLParser for --list: every kept table becomes a
+    TableSummary in self.summaries. Rows and cells are counted as their
+    tags go by; the only text collected is the caption, so listing a page
+    costs a fraction of extracting it.
+    """
+
+    def __init__(self, select=None, max_tables=None, table_index=None):
+        super().__init__(intern_cells=False, select=select, max_tables=max_tables,
+                         table_index=table_index)
+        self.summaries = []
+        self._attrs = ()          # attributes of the last <table> tag
+        self._caption = None      # text parts while inside a <caption>
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self._attrs = attrs
+        super().handle_starttag(tag, attrs)
+        if tag == "caption" and self._frame is not None and not self._frame.in_row:
+            self._caption = []
+
+    def handle_endtag(self, tag):
+        frame = self._frame
+        if tag in ("td", "th") and frame is not None and frame.in_cell:
+            frame.in_cell = frame.collect = False
+        elif tag == "caption" and self._caption is not None:
+            caption = " ".join(html.unescape("".join(self._caption)).split())
+            self._caption = None
+            super().handle_endtag(tag)
+            # With a caption selector the table may only have started now
+            if self._frame is not None and isinstance(self._frame.table, TableSummary):
+                self._frame.table.caption = caption
+        else:
+            super().handle_endtag(tag)
+
+    def handle_data(self, data):
+        if self._caption is not None:
+            self._caption.append(data)
+        frame = self._frame
+        if frame is not None and frame.pending is not None:
+            super().handle_data(data)
+
+    def start_table(self):
+        summary = TableSummary(self._frame.index, {k: v or "" for k, v in self._attrs})
+        self._frame.table = summary
+        self.summaries.append(summary)
+
+    def add_row(self, row):
+        summary = self._frame.table
+        summary.rows += 1
+        summary.cells += self._frame.col
+        summary.columns = max(summary.columns, self._frame.col)
+
+    def end_table(self):
+        pass
+
+
+class Stats:
+    """
+    Wall-clock and CPU time per phase plus event counters for a run.
+
+    Phases nest (cell normalisation happens while parsing); every phase is
+    charged only the time spent in it and not in a nested phase, so the
+    phase times add up to the total. The exception is --pipeline, where
+    "write" is spent in the writer thread alongside the other phases and
+    "queue" is the time the parser waited for it.
+    """
+
+    PHASES = ("network", "read", "decode", "parse", "normalize", "write", "queue")
+
+    def __init__(self, cpu_clock=time.process_time):
+        self.cpu_clock = cpu_clock   # time.thread_time for a Stats kept by another thread
+        self.wall = collections.defaultdict(float)
+        self.cpu = collections.defaultdict(float)
+        self.counters = collections.Counter()
+        self._stack = []
+        self._mark = (0.0, 0.0)
+
+    def start(self, phase):
+        now = (time.perf_counter(), self.cpu_clock())
+        if self._stack:
+            self._charge(self._stack[-1], now)
+        self._stack.append(phase)
+        self._mark = now
+
+    def stop(self):
+        now = (time.perf_counter(), self.cpu_clock())
+        self._charge(self._stack.pop(), now)
+        self._mark = now
+
+    def _charge(self, phase, now):
+        self.wall[phase] += now[0] - self._mark[0]
+        self.cpu[phase] += now[1] - self._mark[1]
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def merge(self, other):
+        """Add the times and counters of another Stats (or its as_dict())."""
+        if isinstance(other, Stats):
+            other = other.as_dict()
+        for name, times in other["phases"].items():
+            self.wall[name] += times["wall"]
+            self.cpu[name] += times["cpu"]
+        self.counters.update(other["counters"])
+
+    def as_dict(self):
+        names = [p for p in self.PHASES if p in self.wall]
+        names += sorted(set(self.wall) - set(names))
+        return {
+            "phases": {p: {"wall": self.wall[p], "cpu": self.cpu[p]} for p in names},
+            "total": {"wall": sum(self.wall.values()), "cpu": sum(self.cpu.values())},
+            "counters": dict(self.counters),
+        }
+
+    def format(self):
+        data = self.as_dict()
+        lines = [f"{'phase':<10} {'wall s':>9} {'cpu s':>9}"]
+        for name, times in list(data["phases"].items()) + [("total", data["total"])]:
+            lines.append(f"{name:<10} {times['wall']:>9.4f} {times['cpu']:>9.4f}")
+        for name, value in sorted(data["counters"].items()):
+            lines.append(f"{name:<22} {value:>12}")
+        return "\n".join(lines)
+
+
+class _StatsParserMixin:
+    """Counts tags, tables, rows and cells and times cell normalisation."""
+
+    stats = None
+
+    def handle_starttag(self, tag, attrs):
+        self.stats.counters["tags"] += 1
+        super().handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in ("td", "th") and self._frame is not None and self._frame.collect:
+            self.stats.start("normalize")
+            super().handle_endtag(tag)
+            self.stats.stop()
+            self.stats.counters["cells"] += 1
+        else:
+            super().handle_endtag(tag)
+
+    def start_table(self):
+        self.stats.counters["tables"] += 1
+        super().start_table()
+
+    def add_row(self, row):
+        self.stats.counters["rows"] += 1
+        super().add_row(row)
+
+
+class _StatsStreamingMixin(_StatsParserMixin):
+    """_StatsParserMixin for StreamingCSVParser, also timing the CSV writes."""
+
+    def add_row(self, row):
+        self.stats.counters["rows"] += 1
+        self.stats.start("write")
+        super(_StatsParserMixin, self).add_row(row)
+        self.stats.stop()
+
+    def close(self):
+        super().close()
+        self.stats.counters["bytes_written"] += self.files.bytes_written
+
+
+class CSVWriterThread(threading.Thread):
+    """
+    Background writer for PipelinedCSVParser. It drains a bounded queue of
+    ("open" | "rows" | "close", table index, rows) messages, writing each
+    batch of rows with one writerows() call into TableCSVFiles opened with
+    a WRITE_BUFFER_SIZE buffer. A full queue blocks the parser, which keeps
+    memory bounded. The write time and bytes written are kept in self.stats.
+    """
+
+    def __init__(self, out_dir="", verbose=True, queue_size=WRITE_QUEUE_SIZE):
+        super().__init__(name="csv-writer", daemon=True)
+        self.files = TableCSVFiles(out_dir, verbose, WRITE_BUFFER_SIZE)
+        self.queue = queue.Queue(queue_size)
+        self.stats = Stats(time.thread_time)
+        self.error = None
+
+    def run(self):
+        while True:
+            message = self.queue.get()
+            if message is None:
+                break
+            if self.error is not None:
+                continue          # keep draining so that the parser never blocks
+            try:
+                with self.stats.phase("write"):
+                    self._handle(*message)
+            except Exception as e:
+                self.error = e
+                self.files.verbose = False
+        self.files.close_all()
+        self.stats.counters["bytes_written"] += self.files.bytes_written
+
+    def _handle(self, op, index, rows):
+        if op == "rows":
+            self.files.writer(index).writerows(rows)
+        elif op == "open":
+            self.files.open(index)
+        else:
+            self.files.close(index)
+
+    def finish(self):
+        """Wait until everything queued is written; re-raise a write error."""
+        self.queue.put(None)
+        self.join()
+        if self.error is not None:
+            raise self.error
+
+
+class PipelinedCSVParser(TableHTMLParser):
+    """
+    TableHTMLParser that hands its rows to a CSVWriterThread, so the CSV
+    files are written while the rest of the page is still being parsed.
+    Rows are sent in batches of batch_rows per table; output is the same
+    as StreamingCSVParser's.
+    """
+
+    stats = None
+
+    def __init__(self, out_dir="", verbose=True, batch_rows=WRITE_BATCH_ROWS,
+                 queue_size=WRITE_QUEUE_SIZE, **parse_options):
+        super().__init__(intern_cells=False, **parse_options)  # rows are written, not kept
+        self.batch_rows = batch_rows
+        self.table_count = 0
+        self.writer = CSVWriterThread(out_dir, verbose, queue_size)
+        self.writer.start()
+        self._batches = []        # [table index, rows not sent yet] per open table, innermost last
+
+    def start_table(self):
+        self.table_count += 1
+        self._send("open", self._frame.index)
+        self._batches.append([self._frame.index, []])
+
+    def add_row(self, row):
+        batch = self._batches[-1]
+        batch[1].append(row)
+        if len(batch[1]) >= self.batch_rows:
+            self._send("rows", batch[0], batch[1])
+            batch[1] = []
+
+    def end_table(self):
+        self._end_batch()
+
+    def close(self):
+        try:
+            super().close()
+            # Tables left open end here, as in TableCSVFiles.close_all().
+            while self._batches:
+                self._end_batch()
+        finally:
+            try:
+                self.writer.finish()
+            finally:
+                if self.stats is not None:
+                    self.stats.merge(self.writer.stats)
+
+    def _end_batch(self):
+        index, rows = self._batches.pop()
+        if rows:
+            self._send("rows", index, rows)
+        self._send("close", index)
+
+    def _send(self, op, index, rows=None):
+        if self.writer.error is not None:
+            raise self.writer.error
+        if self.stats is None:
+            self.writer.queue.put((op, index, rows))
+        else:
+            # Time spent waiting for the writer to make room
+            with self.stats.phase("queue"):
+                self.writer.queue.put((op, index, rows))
+
+
+class Sink(abc.ABC):
+    """
+    Destination for extracted rows (--sink). start_table(index),
+    add_row(index, row) and end_table(index) are called as the tables are
+    parsed; rows of a nested table arrive between its start_table() and
+    end_table(), while the outer table is still open. close() is called
+    once at the end, also after an error. bytes_written is reported by --stats.
+    """
+
+    def __init__(self, path, verbose=True):
+        self.path = path
+        self.verbose = verbose
+        self.bytes_written = 0
+
+    def start_table(self, index):
+        pass
+
+    @abc.abstractmethod
+    def add_row(self, index, row):
+        """Called with the cells of each row of table index."""
+
+    def end_table(self, index):
+        pass
+
+    def close(self):
+        pass
+
+
+class CSVSink(Sink):
+    """table_N.csv files in the directory path, as written without --sink."""
+
+    default_path = ""
+
+    def __init__(self, path, verbose=True):
+        super().__init__(path, verbose)
+        if path:
+            os.makedirs(path, exist_ok=True)
+        self.files = TableCSVFiles(path, verbose)
+
+    def start_table(self, index):
+        self.files.open(index)
+
+    def add_row(self, index, row):
+        self.files.writer(index).writerow(row)
+
+    def end_table(self, index):
+        self.files.close(index)
+
+    def close(self):
+        self.files.close_all()
+        self.bytes_written = self.files.bytes_written
+
+
+class JSONLinesSink(Sink):
+    """
+    One JSON Lines file for all tables, one object per row:
+        {"table": 0, "row": 0, "cells": ["Language", "Year"]}
+    """
+
+    default_path = "tables.jsonl"
+
+    def __init__(self, path, verbose=True):
+        super().__init__(path, verbose)
+        self._file = open(path, "w", encoding="utf-8")
+        self._rows = {}           # table index -> rows so far
+
+    def start_table(self, index):
+        self._rows[index] = 0
+
+    def add_row(self, index, row):
+        n = self._rows[index]
+        self._rows[index] = n + 1
+        self._file.write(json.dumps({"table": index, "row": n, "cells": row}, ensure_ascii=False))
+        self._file.write("\n")
+
+    def close(self):
+        self.bytes_written += self._file.tell()
+        self._file.close()
+        if self.verbose:
+            print(f"Wrote {self.path}")
+
+
+class SQLiteSink(Sink):
+    """
+    One SQLite table per HTML table in the database path:
+        table_N ("row" INTEGER PRIMARY KEY, c0 TEXT, c1 TEXT, ...)
+    with a column added whenever a wider row arrives. Every table_N left
+    from an earlier run is dropped when the sink opens, so the database
+    holds only this run's tables. Rows are inserted SQLITE_BATCH_ROWS at a
+    time with executemany(), inside transactions of SQLITE_COMMIT_ROWS rows.
+    """
+
+    default_path = "tables.db"
+
+    def __init__(self, path, verbose=True):
+        super().__init__(path, verbose)
+        self._db = sqlite3.connect(path, isolation_level=None)  # transactions are explicit
+        self._db.execute("BEGIN")
+        old = self._db.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                               "AND name GLOB 'table_[0-9]*'").fetchall()
+        for (name,) in old:
+            self._db.execute(f'DROP TABLE "{name}"')
+        self._pending = {}        # table index -> rows not inserted yet
+        self._rows = {}           # table index -> rows inserted
+        self._columns = {}        # table index -> number of cN columns
+        self._uncommitted = 0
+
+    def start_table(self, index):
+        self._db.execute(f'CREATE TABLE "table_{index}" ("row" INTEGER PRIMARY KEY)')
+        self._pending[index] = []
+        self._rows[index] = 0
+        self._columns[index] = 0
+
+    def add_row(self, index, row):
+        pending = self._pending[index]
+        pending.append(row)
+        if len(pending) >= SQLITE_BATCH_ROWS:
+            self._flush(index)
+
+    def end_table(self, index):
+        self._flush(index)
+        del self._pending[index]
+
+    def _flush(self, index):
+        rows = self._pending[index]
+        if not rows:
+            return
+        width = max(len(row) for row in rows)
+        for c in range(self._columns[index], width):
+            self._db.execute(f'ALTER TABLE "table_{index}" ADD COLUMN "c{c}" TEXT')
+        width = self._columns[index] = max(width, self._columns[index])
+        first = self._rows[index]
+        padding = [None] * width
+        self._db.executemany(
+            f'INSERT INTO "table_{index}" VALUES ({", ".join("?" * (width + 1))})',
+            ([first + n] + row + padding[len(row):] for n, row in enumerate(rows)))
+        self._rows[index] = first + len(rows)
+        self._pending[index] = []
+        self._uncommitted += len(rows)
+        if self._uncommitted >= SQLITE_COMMIT_ROWS:
+            self._db.execute("COMMIT")
+            self._db.execute("BEGIN")
+            self._uncommitted = 0
+
+    def close(self):
+        try:
+            for index in list(self._pending):
+                self._flush(index)
+            self._db.execute("COMMIT")
+        finally:
+            self._db.close()
+        self.bytes_written += os.path.getsize(self.path)
+        if self.verbose:
+            print(f"Wrote {self.path}")
+
+
+SINKS = {"csv": CSVSink, "jsonl": JSONLinesSink, "sqlite": SQLiteSink}
+
+
+def parse_sink(text):
+    """Parse a --sink value "KIND" or "KIND:PATH" into (kind, path or None)."""
+    kind, _, path = text.partition(":")
+    kind = kind.strip().lower()
+    if kind not in SINKS:
+        raise ValueError(f"unknown sink {kind!r} (choose from {', '.join(SINKS)})")
+    return kind, path or None
+
+
+def open_sinks(specs, out_dir="", verbose=True):
+    """
+    Create the sinks for a list of (kind, path) specs. Relative paths, and
+    the default path of a kind, are taken inside out_dir.
+    """
+    sinks = []
+    try:
+        for kind, path in specs:
+            sink_class = SINKS[kind]
+            path = os.path.join(out_dir, path or sink_class.default_path)
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            sinks.append(sink_class(path, verbose))
+    except BaseException:
+        close_sinks(sinks)
+        raise
+    return sinks
+
+
+def close_sinks(sinks, stats=None):
+    """Close every sink, even if one of them fails; the first error is raised."""
+    error = None
+    for sink in sinks:
+        try:
+            sink.close()
+        except Exception as e:
+            error = error or e
+        if stats is not None:
+            stats.counters["bytes_written"] += sink.bytes_written
+    if error is not None:
+        raise error
+
+
+class SinkParser(TableHTMLParser):
+    """TableHTMLParser that hands every row to all of its sinks as soon as it is parsed."""
+
+    stats = None
+
+    def __init__(self, sinks, **parse_options):
+        super().__init__(intern_cells=False, **parse_options)  # rows are written, not kept
+        self.sinks = sinks
+        self.table_count = 0
+
+    def start_table(self):
+        self.table_count += 1
+        for sink in self.sinks:
+            sink.start_table(self._frame.index)
+
+    def add_row(self, row):
+        if self.stats is not None:
+            self.stats.start("write")
+        for sink in self.sinks:
+            sink.add_row(self._frame.index, row)
+        if self.stats is not None:
+            self.stats.stop()
+
+    def end_table(self):
+        for sink in self.sinks:
+            sink.end_table(self._frame.index)
+
+
+def write_tables_to_sinks(tables, sinks, start=0, stats=None):
+    """Send each table of an iterable (numbered from start) to the sinks; returns the count."""
+    idx = start - 1
+    for idx, table in enumerate(tables, start):
+        for sink in sinks:
+            sink.start_table(idx)
+        if stats is not None:
+            stats.start("write")
+        for row in table:
+            for sink in sinks:
+                sink.add_row(idx, row)
+        if stats is not None:
+            stats.stop()
+        for sink in sinks:
+            sink.end_table(idx)
+    return idx + 1 - start
+
+
+_instrumented_classes = {}
+
+
+def instrumented(parser_class, stats, *args, **kwargs):
+    """
+    Create a parser_class instance that records into stats. The counting
+    lives in a subclass so that uninstrumented parsers pay nothing for it.
+    """
+    klass = _instrumented_classes.get(parser_class)
+    if klass is None:
+        mixin = _StatsStreamingMixin if issubclass(parser_class, StreamingCSVParser) else _StatsParserMixin
+        klass = type("Instrumented" + parser_class.__name__, (mixin, parser_class), {})
+        _instrumented_classes[parser_class] = klass
+    parser = klass(*args, **kwargs)
+    parser.stats = stats
+    return parser
 
-    write_tables_to_csv(parser.tables)
+
+class _TableEventParser(TableHTMLParser):
+    """
+    Queues the rows of each table instead of building tables. A table's
+    id is its index, the number in its table_N.csv file name.
+    """
+
+    def __init__(self, **parse_options):
+        super().__init__(**parse_options)
+        self.opened = collections.deque()   # ids of tables not yet handed out
+        self.rows = {}                      # table id -> deque of rows not yet handed out
+        self.closed = set()                 # ids of tables whose </table> was seen
+
+    def start_table(self):
+        self._frame.table = self._frame.index
+        self.opened.append(self._frame.index)
+        self.rows[self._frame.index] = collections.deque()
+
+    def add_row(self, row):
+        self.rows[self._frame.table].append(row)
+
+    def end_table(self):
+        self.closed.add(self._frame.table)
+
+
+def _close_chunks(chunks):
+    close = getattr(chunks, "close", None)
+    if close is not None:
+        close()
+
+
+def feed_chunks(parser, chunks, stats=None):
+    """
+    Feed an iterable of chunks to a TableHTMLParser until they run out or
+    the parser has every table it wants (parser.done), then close both.
+    """
+    try:
+        for chunk in chunks:
+            if stats is None:
+                parser.feed(chunk)
+            else:
+                with stats.phase("parse"):
+                    parser.feed(chunk)
+            if parser.done:
+                break
+    finally:
+        _close_chunks(chunks)
+        if stats is None:
+            parser.close()
+        else:
+            with stats.phase("parse"):
+                parser.close()
+
+
+class _TableEventStream:
+    """
+    Feeds chunks to a _TableEventParser only when the table or row asked
+    for has not been parsed yet. Rows of a nested table that arrive while
+    the caller is still reading the outer table are kept until asked for.
+    """
+
+    def __init__(self, chunks, **parse_options):
+        self._chunks = iter(chunks)
+        self._parser = _TableEventParser(**parse_options)
+        self._done = False
+
+    def _feed(self):
+        """Parse the next chunk; False once the input is used up."""
+        if self._done:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._parser.close()
+            self._done = True
+        else:
+            self._parser.feed(chunk)
+            if self._parser.done:
+                # Every wanted table is complete: stop reading the source.
+                self._done = True
+                _close_chunks(self._chunks)
+        return True
+
+    def next_table(self):
+        """Id (index) of the next table in document order, or None after the last one."""
+        opened = self._parser.opened
+        while not opened:
+            if not self._feed():
+                return None
+        return opened.popleft()
+
+    def next_row(self, table_id):
+        """Next row of a table, or None once the table is closed and drained."""
+        parser = self._parser
+        rows = parser.rows[table_id]
+        while not rows:
+            if table_id in parser.closed or not self._feed():
+                del parser.rows[table_id]
+                parser.closed.discard(table_id)
+                return None
+        return rows.popleft()
+
+
+class Table:
+    """
+    A table yielded by iter_tables().
+
+    index is the number the CLI gives the table (table_<index>.csv) with
+    the same options. rows is a lazy iterator of cell lists; rows are
+    parsed only as the caller consumes them. Rows not consumed before
+    moving on to the next table are parsed and discarded.
+    """
+
+    def __init__(self, index, stream):
+        self.index = index
+        self._stream = stream
+        self.rows = self._iter_rows()
+
+    def __iter__(self):
+        return self.rows
+
+    def _iter_rows(self):
+        while True:
+            row = self._stream.next_row(self.index)
+            if row is None:
+                return
+            yield row
+
+
+def iter_tables(source, chunk_size=DEFAULT_CHUNK_SIZE, cache=None, prescan=False, **parse_options):
+    """
+    Yield a Table for every <table> of a URL or local file, in document order.
+
+    The page is read and parsed incrementally, so the first table can be
+    consumed while the rest of the page has not been read yet:
+
+        for table in iter_tables("page.html"):
+            for row in table.rows:
+                ...
+
+    parse_options (expand_spans, columns, ...) are passed to TableHTMLParser.
+    """
+    chunks = iter_html_chunks(source, chunk_size, cache, prescan=prescan)
+    stream = _TableEventStream(chunks, **parse_options)
+    try:
+        while True:
+            index = stream.next_table()
+            if index is None:
+                return
+            table = Table(index, stream)
+            yield table
+            for _ in table.rows:
+                pass
+    finally:
+        chunks.close()
+
+
+class HTTPCache:
+    """
+    On-disk cache of HTTP response bodies keyed by URL.
+
+    Each entry is <sha256(url)>.body plus a <sha256(url)>.json holding the
+    charset and the ETag / Last-Modified validators. Entries younger than
+    ttl seconds are served without contacting the server; older ones are
+    revalidated with a conditional GET. Once the bodies exceed max_bytes the
+    least recently used entries are removed. Files are replaced atomically,
+    so several processes can share one cache directory.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_MAX_BYTES, ttl=0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url, suffix):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key + suffix)
+
+    def lookup(self, url):
+        """Return the metadata of the entry for url, or None."""
+        try:
+            with open(self._path(url, ".json"), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url or not os.path.exists(self._path(url, ".body")):
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        return time.time() - entry["stored_at"] < self.ttl
+
+    def validators(self, entry):
+        """Conditional request headers for a stored entry."""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def open_body(self, url):
+        """Open a stored body for reading and mark it as recently used."""
+        path = self._path(url, ".body")
+        f = open(path, "rb")
+        os.utime(path)
+        return f
+
+    def read_body(self, url):
+        with self.open_body(url) as f:
+            return f.read()
+
+    def revalidated(self, url, entry):
+        """Restart the TTL of an entry after the server answered 304."""
+        entry["stored_at"] = time.time()
+        self._write_meta(url, entry)
+
+    def storable(self, headers):
+        return "no-store" not in (headers.get("Cache-Control") or "").lower()
+
+    def store(self, url, body, headers, charset):
+        """Store a complete response body."""
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        self.commit(url, tmp, headers, charset)
+
+    def wrap(self, url, resp, charset):
+        """
+        Return a stream reading resp that copies the body into the cache as
+        it is read; the entry is stored once the body has been read in full.
+        """
+        return _CachingReader(self, url, resp, charset)
+
+    def commit(self, url, tmp_path, headers, charset):
+        os.replace(tmp_path, self._path(url, ".body"))
+        self._write_meta(url, {
+            "url": url,
+            "charset": charset,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "stored_at": time.time(),
+        })
+        self.evict()
+
+    def _write_meta(self, url, entry):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, self._path(url, ".json"))
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".body"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name[:-len(".body")]))
+            total += st.st_size
+        entries.sort()
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            for suffix in (".body", ".json"):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(self.directory, key + suffix))
+            total -= size
+
+
+class _CachingReader:
+    """Binary stream used by HTTPCache.wrap()."""
+
+    def __init__(self, cache, url, resp, charset):
+        self._cache = cache
+        self._url = url
+        self._resp = resp
+        self._charset = charset
+        fd, self._tmp_path = tempfile.mkstemp(dir=cache.directory, suffix=".tmp")
+        self._tmp = os.fdopen(fd, "wb")
+        self._complete = False
+
+    def read(self, n=-1):
+        data = self._resp.read(n)
+        self._tmp.write(data)
+        if not data or n is None or n < 0:
+            self._complete = True
+        return data
+
+    @property
+    def headers(self):
+        return self._resp.headers
+
+    @property
+    def wire_bytes(self):
+        return self._resp.wire_bytes
+
+    def close(self):
+        if self._tmp.closed:
+            return
+        self._resp.close()
+        self._tmp.close()
+        if self._complete:
+            self._cache.commit(self._url, self._tmp_path, self._resp.headers, self._charset)
+        else:
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ContentDecodingReader:
+    """
+    Binary stream over an HTTP response that undoes a gzip or deflate
+    Content-Encoding as the body is read. Each read() takes at most one
+    network chunk (read1()), so it returns as soon as data arrives and the
+    compressed and decompressed bodies are never held in memory together.
+    wire_bytes and decoded_bytes count the bytes received and produced so
+    far.
+    """
+
+    def __init__(self, resp, url="", verbose=False):
+        self._resp = resp
+        self.headers = resp.headers
+        self.url = url
+        self.verbose = verbose
+        self.encoding = (resp.headers.get("Content-Encoding") or "identity").strip().lower()
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        self._zlib = None
+        self._eof = False
+        if self.encoding in ("gzip", "x-gzip"):
+            self._zlib = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def read(self, n=-1):
+        if n is None or n < 0:
+            return b"".join(iter(lambda: self.read(DEFAULT_CHUNK_SIZE), b""))
+        while True:
+            if self._zlib is not None and self._zlib.unconsumed_tail:
+                data = self._zlib.decompress(self._zlib.unconsumed_tail, n)
+            elif self._eof:
+                data = self._zlib.flush() if self._zlib is not None else b""
+                self.decoded_bytes += len(data)
+                return data
+            else:
+                raw = self._resp.read1(n)
+                self.wire_bytes += len(raw)
+                if not raw:
+                    self._eof = True
+                    continue
+                if self.encoding == "deflate" and self._zlib is None:
+                    self._zlib = zlib.decompressobj(_deflate_wbits(raw))
+                data = self._zlib.decompress(raw, n) if self._zlib is not None else raw
+            if data:
+                self.decoded_bytes += len(data)
+                return data
+
+    def close(self):
+        self._resp.close()
+        if self.verbose:
+            print(f"{self.url}: {self.wire_bytes} bytes on the wire, "
+                  f"{self.decoded_bytes} bytes decoded ({self.encoding})", file=sys.stderr)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _deflate_wbits(first_bytes):
+    """
+    Content-Encoding: deflate should be zlib-wrapped, but some servers send
+    a raw deflate stream; tell the two apart from the zlib header.
+    """
+    if (len(first_bytes) >= 2 and first_bytes[0] & 0x0F == 8
+            and (first_bytes[0] << 8 | first_bytes[1]) % 31 == 0):
+        return zlib.MAX_WBITS
+    return -zlib.MAX_WBITS
+
+
+def open_url(url, cache=None, verbose=False, timeout=None):
+    """
+    Open a URL as a binary stream, going through cache when one is given.
+    timeout, if given, is the socket timeout in seconds for connecting and
+    for every read. Returns (stream, charset); the caller is responsible
+    for closing it.
+    """
+    req = urllib.request.Request(url)
+    req.add_header('User-Agent', USER_AGENT)
+    req.add_header('Accept-Encoding', ACCEPT_ENCODING)
+    entry = cache.lookup(url) if cache is not None else None
+    if entry is not None:
+        if cache.is_fresh(entry):
+            if verbose:
+                print(f"{url}: served from cache", file=sys.stderr)
+            return cache.open_body(url), entry["charset"]
+        for name, value in cache.validators(entry).items():
+            req.add_header(name, value)
+    try:
+        if timeout is None:
+            resp = urllib.request.urlopen(req)
+        else:
+            resp = urllib.request.urlopen(req, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        if e.code != 304 or entry is None:
+            raise
+        e.close()
+        cache.revalidated(url, entry)
+        if verbose:
+            print(f"{url}: not modified, served from cache", file=sys.stderr)
+        return cache.open_body(url), entry["charset"]
+    charset = resp.headers.get_content_charset() or "utf-8"
+    resp = ContentDecodingReader(resp, url, verbose)
+    if cache is not None and cache.storable(resp.headers):
+        return cache.wrap(url, resp, charset), charset
+    return resp, charset
+
+
+TABLE_SCAN_RE = re.compile(
+    rb"(?P<skip><!--.*?-->|<script\b.*?</script\s*>|<style\b.*?</style\s*>)"
+    rb"|<(?P<close>/?)table\b",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def iter_table_spans(buf):
+    """
+    Yield (start, end) byte offsets of the outermost <table> ... </table>
+    regions of an HTML document held in a bytes-like object (e.g. an mmap).
+    Nested tables stay inside their outer region; "<table" inside comments,
+    scripts and styles is ignored. An unclosed table runs to the end.
+    """
+    depth = 0
+    start = 0
+    for m in TABLE_SCAN_RE.finditer(buf):
+        if m.group("skip"):
+            continue
+        if not m.group("close"):
+            if depth == 0:
+                start = m.start()
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                close = buf.find(b">", m.end())
+                yield start, (len(buf) if close == -1 else close + 1)
+    if depth:
+        yield start, len(buf)
+
+
+def iter_table_region_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, stats=None):
+    """
+    Yield the decoded text of the <table> regions of a local HTML file,
+    found by iter_table_spans() over an mmap of the file, in chunks of at
+    most chunk_size bytes. Bytes outside the tables are never decoded.
+    stats, if given, counts the bytes decoded as bytes_read.
+    """
+    with open(path, "rb") as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return      # empty file
+    with buf:
+        for start, end in iter_table_spans(buf):
+            decoder = io.IncrementalNewlineDecoder(
+                codecs.getincrementaldecoder("utf-8")(errors="replace"), translate=True)
+            for pos in range(start, end, chunk_size):
+                data = buf[pos:min(pos + chunk_size, end)]
+                if stats is not None:
+                    stats.counters["bytes_read"] += len(data)
+                text = decoder.decode(data)
+                if text:
+                    yield text
+            text = decoder.decode(b"", final=True)
+            if text:
+                yield text
+
+
+ENGINES = {}                # name -> engine; see register_engine()
+DEFAULT_ENGINE = "htmlparser"
+ENGINE_MODULES = ("table_engines",)
+
+
+def register_engine(engine):
+    """
+    Add a table extractor to ENGINES. An engine has a name, a one-line
+    description and a parse(html) method taking the page as a str or an
+    iterable of str chunks and returning an iterable of tables (lists of
+    rows of cell strings).
+    """
+    ENGINES[engine.name] = engine
+    return engine
+
+
+def _load_engine_modules():
+    for module_name in ENGINE_MODULES:
+        module = importlib.import_module(module_name)
+        module.register_all(register_engine)
+
+
+def get_engine(name):
+    """Return the registered engine called name."""
+    if name not in ENGINES:
+        _load_engine_modules()
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f"unknown engine {name!r}; available: {', '.join(sorted(ENGINES))}") from None
+
+
+def list_engines():
+    """Return every registered engine, including those of ENGINE_MODULES."""
+    _load_engine_modules()
+    return [ENGINES[name] for name in sorted(ENGINES)]
+
+
+class HTMLParserEngine:
+    """The built-in engine: TableHTMLParser, yielding each table once it is complete."""
+
+    name = DEFAULT_ENGINE
+    description = "read_html_table.py: TableHTMLParser (html.parser), tables yielded as they close"
+
+    def parse(self, html):
+        stream = _TableEventStream([html] if isinstance(html, str) else html)
+        while True:
+            table_id = stream.next_table()
+            if table_id is None:
+                return
+            yield list(iter(lambda: stream.next_row(table_id), None))
+
+
+register_engine(HTMLParserEngine())
+
+
+def open_source(source: str, cache=None, verbose=False, timeout=None):
+    """
+    Open a URL or a local file path as a binary stream.
+    Returns (stream, charset); the caller is responsible for closing it.
+    Adds browser User-Agent to bypass Wikipedia blocks.
+    timeout is the socket timeout of URL sources (see open_url()).
+    """
+    parsed = urlparse(source)
+    if parsed.scheme in ("http", "https"):
+        return open_url(source, cache, verbose, timeout)
+    return open(source, "rb"), "utf-8"
+
+
+def iter_html_chunks(source: str, chunk_size: int = DEFAULT_CHUNK_SIZE, cache=None, verbose=False,
+                     prescan=False, stats=None, timeout=None):
+    """
+    Yield the decoded HTML of a URL or local file in chunks of at most
+    chunk_size bytes, using an incremental decoder so that multi-byte
+    characters split across chunk boundaries are decoded correctly.
+    With prescan, local files yield only their <table> regions.
+    stats, if given, is charged the read/network and decode time. If the
+    caller closes the generator early, the source is closed straight away
+    and the bytes that were never read are counted as bytes_skipped (on
+    the wire for downloads, when the server sent a Content-Length).
+    timeout is the socket timeout of URL sources (see open_url()).
+    """
+    is_url = urlparse(source).scheme in ("http", "https")
+    if prescan and not is_url:
+        # The scan and the decoding are interleaved; charge them as "read".
+        chunks = iter_table_region_chunks(source, chunk_size, stats)
+        while True:
+            if stats is not None:
+                stats.start("read")
+            text = next(chunks, None)
+            if stats is not None:
+                stats.stop()
+            if text is None:
+                return
+            yield text
+    io_phase = "network" if is_url else "read"
+    if stats is not None:
+        stats.start(io_phase)
+    stream, charset = open_source(source, cache, verbose, timeout)
+    if stats is not None:
+        stats.stop()
+    decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+    if not is_url:
+        # Match the universal-newline handling of text-mode file reads.
+        decoder = io.IncrementalNewlineDecoder(decoder, translate=True)
+    consumed = 0
+    finished = False
+    with stream:
+        try:
+            while True:
+                if stats is None:
+                    data = stream.read(chunk_size)
+                    text = decoder.decode(data) if data else ""
+                else:
+                    with stats.phase(io_phase):
+                        data = stream.read(chunk_size)
+                    with stats.phase("decode"):
+                        text = decoder.decode(data) if data else ""
+                    stats.counters["bytes_read"] += len(data)
+                if not data:
+                    break
+                consumed += len(data)
+                if text:
+                    yield text
+            finished = True
+        finally:
+            if stats is not None:
+                if hasattr(stream, "wire_bytes"):
+                    stats.counters["bytes_on_wire"] += stream.wire_bytes
+                if not finished:
+                    stats.counters["bytes_skipped"] += _unread_bytes(stream, consumed) or 0
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def _unread_bytes(stream, consumed):
+    """Bytes of a source stream that were never read, or None if unknown."""
+    if hasattr(stream, "wire_bytes"):
+        length = stream.headers.get("Content-Length") or ""
+        return max(int(length) - stream.wire_bytes, 0) if length.isdigit() else None
+    try:
+        return max(os.fstat(stream.fileno()).st_size - consumed, 0)
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def load_html(source: str, cache=None, verbose=False, prescan=False, stats=None) -> str:
+    """
+    Load HTML content from a URL or a local file path.
+    Adds browser User-Agent to bypass Wikipedia blocks.
+    With prescan, only the <table> regions of a local file are loaded.
+    With stats, the page is read in chunks so reading and decoding can be timed.
+    """
+    if stats is not None:
+        return "".join(iter_html_chunks(source, cache=cache, verbose=verbose, prescan=prescan,
+                                        stats=stats))
+    parsed = urlparse(source)
+    if prescan and parsed.scheme not in ("http", "https"):
+        return "".join(iter_table_region_chunks(source))
+    if parsed.scheme in ("http", "https"):
+        stream, charset = open_source(source, cache, verbose)
+        with stream as resp:
+            return resp.read().decode(charset, errors="replace")
+    else:
+        with open(source, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+
+
+class HostConnectionPool:
+    """
+    Keep-alive http.client connections pooled per (scheme, host:port).
+
+    At most per_host requests are in flight to the same host at a time;
+    a connection goes back to the pool once its response has been read.
+    """
+
+    def __init__(self, per_host=4, timeout=30):
+        self.per_host = per_host
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._lock = threading.Lock()
+        self._idle = {}     # (scheme, netloc) -> list of idle connections
+        self._slots = {}    # (scheme, netloc) -> BoundedSemaphore(per_host)
+
+    @contextlib.contextmanager
+    def connection(self, scheme, netloc):
+        key = (scheme, netloc)
+        with self._lock:
+            slots = self._slots.setdefault(key, threading.BoundedSemaphore(self.per_host))
+        with slots:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                conn = idle.pop() if idle else None
+            if conn is None:
+                conn = self._connect(scheme, netloc)
+            reusable = False
+            try:
+                yield conn
+                reusable = True
+            finally:
+                if reusable:
+                    with self._lock:
+                        self._idle[key].append(conn)
+                else:
+                    conn.close()
+
+    def _connect(self, scheme, netloc):
+        with self._lock:
+            self.connections_opened += 1
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(netloc, timeout=self.timeout)
+
+    def close(self):
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+
+class ConcurrentFetcher:
+    """
+    Fetch many URLs concurrently with a thread pool over HostConnectionPool.
+
+    workers caps the number of requests in flight overall and per_host caps
+    it per host. fetch_all() hands finished bodies to the caller through a
+    bounded queue, so fetching pauses while the consumer falls behind.
+    """
+
+    def __init__(self, workers=8, per_host=4, timeout=30, queue_size=None, cache=None,
+                 verbose=False):
+        self.workers = workers
+        self.pool = HostConnectionPool(per_host, timeout)
+        self.queue_size = queue_size or 2 * workers
+        self.cache = cache
+        self.verbose = verbose
+
+    def fetch(self, url):
+        """
+        Return (body bytes, charset, bytes on the wire) for url, following
+        redirects; the wire bytes of every response on the way are counted.
+        """
+        cache = self.cache
+        wire_bytes = 0
+        for _ in range(MAX_REDIRECTS + 1):
+            entry = cache.lookup(url) if cache is not None else None
+            if entry is not None and cache.is_fresh(entry):
+                return cache.read_body(url), entry["charset"], wire_bytes
+            extra = cache.validators(entry) if entry is not None else {}
+            status, reason, headers, body, wire = self._get(url, extra)
+            wire_bytes += wire
+            location = headers.get("Location")
+            if status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            if status == 304 and entry is not None:
+                cache.revalidated(url, entry)
+                return cache.read_body(url), entry["charset"], wire_bytes
+            if status >= 400:
+                raise urllib.error.HTTPError(url, status, reason, headers, None)
+            charset = headers.get_content_charset() or "utf-8"
+            if cache is not None and cache.storable(headers):
+                cache.store(url, body, headers, charset)
+            return body, charset, wire_bytes
+        raise urllib.error.URLError(f"too many redirects for {url}")
+
+    def _get(self, url, extra_headers=None):
+        parsed = urlparse(url)
+        path = (parsed.path or "/") + (f"?{parsed.query}" if parsed.query else "")
+        request_headers = {"User-Agent": USER_AGENT, "Connection": "keep-alive",
+                           "Accept-Encoding": ACCEPT_ENCODING}
+        request_headers.update(extra_headers or {})
+        with self.pool.connection(parsed.scheme, parsed.netloc) as conn:
+            for attempt in range(2):
+                try:
+                    conn.request("GET", path, headers=request_headers)
+                    resp = conn.getresponse()
+                    reader = ContentDecodingReader(resp, url, self.verbose and resp.status == 200)
+                    body = reader.read()
+                    reader.close()
+                    return resp.status, resp.reason, resp.headers, body, reader.wire_bytes
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    # The server dropped an idle keep-alive connection;
+                    # http.client reconnects on the next request.
+                    conn.close()
+                    if attempt:
+                        raise
+
+    def fetch_all(self, urls):
+        """
+        Fetch every URL and yield (index, url, (body, charset, network), error)
+        in completion order; error is None on success. network is
+        (wall seconds, CPU seconds of the fetching thread, bytes on the wire).
+        """
+        results = queue.Queue(self.queue_size)
+        stop = threading.Event()
+
+        def work(index, url):
+            if stop.is_set():
+                return
+            try:
+                start = (time.perf_counter(), time.thread_time())
+                body, charset, wire_bytes = self.fetch(url)
+                network = (time.perf_counter() - start[0], time.thread_time() - start[1], wire_bytes)
+                item = (index, url, (body, charset, network), None)
+            except Exception as e:
+                item = (index, url, None, e)
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        threads = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            for index, url in enumerate(urls):
+                threads.submit(work, index, url)
+            for _ in range(len(urls)):
+                yield results.get()
+        finally:
+            stop.set()
+            threads.shutdown(wait=True, cancel_futures=True)
+
+    def close(self):
+        self.pool.close()
+
+
+def write_tables_to_csv(tables, out_dir="", verbose=True, stats=None, start=0):
+    """
+    Write each table to a CSV file in out_dir: table_0.csv, table_1.csv, ...
+    (numbered from start). tables may be any iterable, e.g. an engine's
+    generator. Returns the number of tables written.
+    """
+    idx = start - 1
+    for idx, table in enumerate(tables, start):
+        filename = os.path.join(out_dir, f"table_{idx}.csv")
+        if stats is not None:
+            stats.start("write")
+        with open(filename, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            for row in table:
+                writer.writerow(row)
+            if stats is not None:
+                stats.counters["bytes_written"] += f.tell()
+        if stats is not None:
+            stats.stop()
+        if verbose:
+            print(f"Wrote {filename}")
+    return idx + 1 - start
+
+
+class Manifest:
+    """
+    SQLite record of what --manifest runs wrote. Per source and output
+    directory it keeps the SHA-256 of the page body and a key of the
+    extraction options, and per table file the SHA-256 of its rows.
+    Batch workers each open the file; SQLite serialises their updates.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sources (
+            source TEXT, out_dir TEXT, body_sha256 TEXT, options TEXT,
+            PRIMARY KEY (source, out_dir));
+        CREATE TABLE IF NOT EXISTS tables (
+            source TEXT, out_dir TEXT, name TEXT, rows_sha256 TEXT,
+            PRIMARY KEY (source, out_dir, name));
+    """
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.executescript(self.SCHEMA)
+
+    def load(self, source, out_dir):
+        """Return (body hash, options key, {file name: rows hash}), or None if never recorded."""
+        row = self.db.execute("SELECT body_sha256, options FROM sources WHERE source = ? AND out_dir = ?",
+                              (source, out_dir)).fetchone()
+        if row is None:
+            return None
+        tables = dict(self.db.execute("SELECT name, rows_sha256 FROM tables WHERE source = ? AND out_dir = ?",
+                                      (source, out_dir)))
+        return row[0], row[1], tables
+
+    def save(self, source, out_dir, body_hash, options_key, tables):
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                            (source, out_dir, body_hash, options_key))
+            self.db.execute("DELETE FROM tables WHERE source = ? AND out_dir = ?", (source, out_dir))
+            self.db.executemany("INSERT INTO tables VALUES (?, ?, ?, ?)",
+                                [(source, out_dir, name, h) for name, h in tables.items()])
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    def close(self):
+        self.db.close()
+
+
+class ManifestEntry:
+    """
+    The manifest record of one source written to one output directory.
+    Only names are kept, so it can be sent to a batch worker process.
+    """
+
+    def __init__(self, path, source, out_dir, options_key):
+        self.path = path
+        self.source = source
+        self.out_dir = os.path.abspath(out_dir or ".")
+        self.options_key = options_key
+
+
+def rows_sha256(rows):
+    """SHA-256 of a table's rows, as compared by --manifest."""
+    h = hashlib.sha256()
+    for row in rows:
+        h.update(json.dumps(row, ensure_ascii=False).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def write_changed_tables(tables, out_dir="", old_hashes=None, verbose=True, stats=None, start=0):
+    """
+    write_tables_to_csv() for --manifest: a table whose rows hash the same
+    as in old_hashes ({file name: hash}) and whose file still exists is not
+    written again; the others are written to a temporary file that is then
+    renamed over table_N.csv. Returns (tables, {file name: hash}).
+    """
+    old_hashes = old_hashes or {}
+    hashes = {}
+    for idx, table in enumerate(tables, start):
+        name = f"table_{idx}.csv"
+        filename = os.path.join(out_dir, name)
+        rows = table if isinstance(table, list) else list(table)
+        hashes[name] = rows_sha256(rows)
+        if old_hashes.get(name) == hashes[name] and os.path.exists(filename):
+            if stats is not None:
+                stats.counters["tables_unchanged"] += 1
+            continue
+        if stats is not None:
+            stats.start("write")
+        fd, tmp = tempfile.mkstemp(dir=out_dir or ".", prefix=".table_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerows(rows)
+                if stats is not None:
+                    stats.counters["bytes_written"] += f.tell()
+            os.replace(tmp, filename)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        finally:
+            if stats is not None:
+                stats.stop()
+        if verbose:
+            print(f"Wrote {filename}")
+    return len(hashes), hashes
+
+
+def parse_tables(html_text, engine=DEFAULT_ENGINE, stats=None, parse_options=None):
+    """
+    Every table of an HTML document (a str or an iterable of str chunks)
+    as lists of rows, parsed by the named engine with parse_options
+    (ExtractOptions.parse_options()). Other engines return an iterable
+    that parses as it goes.
+    """
+    parse_options = parse_options or {}
+    if engine != DEFAULT_ENGINE:
+        engine = get_engine(engine)
+        tables = engine.parse(html_text) if stats is None else _timed_tables(engine, html_text, stats)
+        table_index = parse_options.get("table_index")
+        if table_index is not None:
+            return itertools.islice(tables, table_index, table_index + 1)
+        if parse_options.get("max_tables") is not None:
+            return itertools.islice(tables, parse_options["max_tables"])
+        return tables
+    if stats is None:
+        parser = TableHTMLParser(**parse_options)
+    else:
+        parser = instrumented(TableHTMLParser, stats, **parse_options)
+    feed_chunks(parser, [html_text] if isinstance(html_text, str) else html_text, stats)
+    return parser.tables
+
+
+def _extract_incremental(html_text, out_dir, verbose, engine, stats, parse_options, entry):
+    # extract_html() with a ManifestEntry: skip an unchanged body, then unchanged tables
+    body_hash = hashlib.sha256(html_text.encode("utf-8", "surrogatepass")).hexdigest()
+    manifest = Manifest(entry.path)
+    try:
+        old = manifest.load(entry.source, entry.out_dir)
+        old_hashes = old[2] if old is not None else {}
+        if (old is not None and old[:2] == (body_hash, entry.options_key)
+                and all(os.path.exists(os.path.join(out_dir, name)) for name in old_hashes)):
+            if stats is not None:
+                stats.counters["sources_unchanged"] += 1
+            if verbose:
+                print(f"Unchanged {entry.source}")
+            return len(old_hashes)
+        start = parse_options.get("table_index") or 0
+        tables = parse_tables(html_text, engine, stats, parse_options)
+        count, hashes = write_changed_tables(tables, out_dir, old_hashes, verbose, stats, start)
+        # Tables the page no longer has
+        for name in set(old_hashes) - set(hashes):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(out_dir, name))
+            if stats is not None:
+                stats.counters["tables_removed"] += 1
+        manifest.save(entry.source, entry.out_dir, body_hash, entry.options_key, hashes)
+        return count
+    finally:
+        manifest.close()
+
+
+class RevisionStore:
+    """
+    SQLite history of the successive extractions of each (source, options,
+    table). options is a hash of the options that shape the rows
+    (ExtractOptions.output_options()), so that a run with other columns or
+    filters is not compared with the history of another.
+
+    Rows are identified by a key (their first cell, numbered when it
+    repeats in the table) and stored as operations: "+" added, "~" changed
+    or "-" removed, with a SHA-256 of the row's cells. A base revision holds
+    the whole table as "+" operations; the revisions after it hold only
+    the rows that changed, and a run that changes nothing adds none. Once
+    the operations since the last base outnumber the rows of the table a
+    new base is written, so rebuilding a table never replays more than
+    about twice its size.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS revisions (
+            source TEXT, options TEXT, table_index INTEGER, rev INTEGER, created REAL, base INTEGER,
+            PRIMARY KEY (source, options, table_index, rev));
+        CREATE TABLE IF NOT EXISTS row_ops (
+            source TEXT, options TEXT, table_index INTEGER, rev INTEGER,
+            op TEXT, row_key TEXT, row_sha256 TEXT, cells TEXT);
+        CREATE INDEX IF NOT EXISTS row_ops_revision ON row_ops (source, options, table_index, rev);
+    """
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.executescript(self.SCHEMA)
+
+    @staticmethod
+    def keyed_rows(rows):
+        """{row key: (row hash, cells)} of a table's rows, in row order."""
+        keyed = {}
+        seen = collections.Counter()
+        for cells in rows:
+            first = cells[0] if cells else ""
+            seen[first] += 1
+            digest = hashlib.sha256(json.dumps(cells, ensure_ascii=False).encode("utf-8")).hexdigest()
+            keyed[f"{seen[first]}:{first}"] = (digest, cells)
+        return keyed
+
+    def load(self, source, options, table_index, rev=None):
+        """
+        Rebuild a table as of revision rev (default: the latest). Returns
+        (rev, {row key: (row hash, cells)}, operations stored since the
+        base); rev is None for a table that was never recorded.
+        """
+        key = (source, options, table_index)
+        where = "source = ? AND options = ? AND table_index = ?"
+        if rev is None:
+            rev = self.db.execute(f"SELECT MAX(rev) FROM revisions WHERE {where}", key).fetchone()[0]
+            if rev is None:
+                return None, {}, 0
+        base = self.db.execute(f"SELECT MAX(rev) FROM revisions WHERE {where} AND base = 1 AND rev <= ?",
+                               key + (rev,)).fetchone()[0]
+        rows = {}
+        ops = 0
+        for op_rev, op, row_key, digest, cells in self.db.execute(
+                f"SELECT rev, op, row_key, row_sha256, cells FROM row_ops WHERE {where} "
+                "AND rev BETWEEN ? AND ? ORDER BY rev, rowid", key + (base, rev)):
+            if op == "-":
+                rows.pop(row_key, None)
+            else:
+                rows[row_key] = (digest, json.loads(cells))
+            ops += op_rev > base
+        return rev, rows, ops
+
+    def record(self, source, options, table_index, rows):
+        """
+        Store rows as the next revision of the table. Returns its changes
+        against the previous revision as a list of (op, cells), removed rows
+        with their old cells; a table seen for the first time is all "+".
+        """
+        new = self.keyed_rows(rows)
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            rev, old, since_base = self.load(source, options, table_index)
+            changes = []
+            for row_key, (digest, cells) in new.items():
+                if row_key not in old:
+                    changes.append(("+", row_key, digest, cells))
+                elif old[row_key][0] != digest:
+                    changes.append(("~", row_key, digest, cells))
+            changes += [("-", row_key, digest, cells) for row_key, (digest, cells) in old.items()
+                        if row_key not in new]
+            if changes:
+                base = rev is None or since_base + len(changes) > len(new)
+                ops = [("+", k, d, c) for k, (d, c) in new.items()] if base else changes
+                rev = 0 if rev is None else rev + 1
+                self.db.execute("INSERT INTO revisions VALUES (?, ?, ?, ?, ?, ?)",
+                                (source, options, table_index, rev, time.time(), int(base)))
+                self.db.executemany("INSERT INTO row_ops VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                    [(source, options, table_index, rev, op, k, d,
+                                      json.dumps(c, ensure_ascii=False)) for op, k, d, c in ops])
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+        return [(op, cells) for op, _, _, cells in changes]
+
+    def close(self):
+        self.db.close()
+
+
+class RevisionEntry:
+    """
+    The --revisions store, source and options key of one page, and whether
+    only the changes are written (--delta). Like ManifestEntry, it can be
+    sent to a batch worker process.
+    """
+
+    def __init__(self, path, source, delta=False, options_key=""):
+        self.path = path
+        self.source = source
+        self.delta = delta
+        self.options_key = options_key
+
+
+DELTA_OPS = {"+": "rows_added", "-": "rows_removed", "~": "rows_changed"}
+
+
+def write_table_deltas(tables, out_dir="", store=None, entry=None, verbose=True, stats=None, start=0):
+    """
+    Record every table of the RevisionEntry entry in a RevisionStore and
+    write only its changes to
+    out_dir/table_N.delta.csv: the operation (+ added, - removed,
+    ~ changed) followed by the row's cells. A table without changes gets
+    no file, and one left by an earlier run is removed. Returns the
+    number of tables.
+    """
+    idx = start - 1
+    for idx, table in enumerate(tables, start):
+        changes = store.record(entry.source, entry.options_key, idx,
+                               table if isinstance(table, list) else list(table))
+        filename = os.path.join(out_dir, f"table_{idx}.delta.csv")
+        if not changes:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(filename)
+            continue
+        counts = collections.Counter(DELTA_OPS[op] for op, _ in changes)
+        if stats is not None:
+            stats.counters.update(counts)
+            stats.start("write")
+        with open(filename, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows([op] + cells for op, cells in changes)
+            if stats is not None:
+                stats.counters["bytes_written"] += f.tell()
+        if stats is not None:
+            stats.stop()
+        if verbose:
+            print(f"Wrote {filename} ({counts['rows_added']} added, {counts['rows_removed']} removed, "
+                  f"{counts['rows_changed']} changed)")
+    return idx + 1 - start
+
+
+def _extract_revisions(html_text, out_dir, verbose, engine, stats, parse_options, entry):
+    # extract_html() with a RevisionEntry: record every table, then write it whole or only its changes
+    start = parse_options.get("table_index") or 0
+    store = RevisionStore(entry.path)
+    try:
+        tables = parse_tables(html_text, engine, stats, parse_options)
+        if entry.delta:
+            return write_table_deltas(tables, out_dir, store, entry, verbose, stats, start)
+        tables = [table if isinstance(table, list) else list(table) for table in tables]
+        for idx, table in enumerate(tables, start):
+            store.record(entry.source, entry.options_key, idx, table)
+        return write_tables_to_csv(tables, out_dir, verbose, stats, start)
+    finally:
+        store.close()
+        _close_chunks(html_text)
+
+
+class ExtractOptions:
+    """
+    How extract_source() reads and parses a page; passed to batch workers.
+
+    stream      parse in chunks and write rows as soon as they are complete
+    pipeline    like stream, but rows are written by a background thread
+    sinks       (kind, path) specs of the --sink outputs, or None for CSV files
+    manifest    path of the --manifest file, or None
+    revisions   path of the --revisions file, or None
+    delta       with revisions, write only the rows that changed (table_N.delta.csv)
+    chunk_size  bytes read per chunk
+    cache       HTTPCache for URL sources, or None
+    verbose     report the download size of URL sources on stderr
+    prescan     decode and parse only the <table> regions of local files
+    engine      name of the registered engine that extracts the tables
+    expand_spans  place rowspan/colspan cells in every grid position they cover
+    columns     keep only these columns (names and/or indexes), or None
+    where       RowFilter that rows must pass, or None
+    max_tables  stop reading once the first N tables are complete, or None
+    table_index extract only the table with this index, then stop reading
+    select      TableSelector that tables must match, or None
+    """
+
+    def __init__(self, stream=False, chunk_size=DEFAULT_CHUNK_SIZE, cache=None, verbose=False,
+                 prescan=False, engine=DEFAULT_ENGINE, expand_spans=False, columns=None, where=None,
+                 max_tables=None, table_index=None, select=None, pipeline=False, sinks=None,
+                 manifest=None, revisions=None, delta=False):
+        self.stream = stream
+        self.pipeline = pipeline
+        self.sinks = sinks
+        self.manifest = manifest
+        self.revisions = revisions
+        self.delta = delta
+        self.chunk_size = chunk_size
+        self.cache = cache
+        self.verbose = verbose
+        self.prescan = prescan
+        self.engine = engine
+        self.expand_spans = expand_spans
+        self.columns = columns
+        self.where = where
+        self.max_tables = max_tables
+        self.table_index = table_index
+        self.select = select
+
+    def parse_options(self):
+        """Keyword arguments for TableHTMLParser and its subclasses."""
+        return {"expand_spans": self.expand_spans, "columns": self.columns, "where": self.where,
+                "max_tables": self.max_tables, "table_index": self.table_index,
+                "select": self.select}
+
+    def output_options(self):
+        """The options that change the rows of the tables written, as a dict for JSON."""
+        return {"engine": self.engine, "expand_spans": self.expand_spans, "columns": self.columns,
+                "where": self.where and self.where.text, "select": self.select and self.select.text}
+
+    def manifest_entry(self, source, out_dir):
+        """ManifestEntry for source written to out_dir, or None without --manifest."""
+        if not self.manifest:
+            return None
+        key = json.dumps(dict(self.output_options(), prescan=self.prescan, max_tables=self.max_tables,
+                              table_index=self.table_index), sort_keys=True)
+        return ManifestEntry(self.manifest, source, out_dir, key)
+
+    def revision_entry(self, source):
+        """RevisionEntry for source, or None without --revisions."""
+        if not self.revisions:
+            return None
+        key = json.dumps(self.output_options(), sort_keys=True)
+        return RevisionEntry(self.revisions, source, self.delta,
+                             hashlib.sha256(key.encode("utf-8")).hexdigest()[:16])
+
+    def stops_early(self):
+        """True when only some tables are wanted and reading can stop after them."""
+        return self.max_tables is not None or self.table_index is not None
+
+
+def stream_tables_to_csv(source, out_dir="", options=None, verbose=True, stats=None):
+    """
+    Parse the source chunk by chunk, writing every row to its table's CSV
+    file as soon as it is complete. Returns the number of tables written.
+    """
+    options = options or ExtractOptions(stream=True)
+    parser_class = PipelinedCSVParser if options.pipeline else StreamingCSVParser
+    if stats is None:
+        parser = parser_class(out_dir, verbose, **options.parse_options())
+    else:
+        parser = instrumented(parser_class, stats, out_dir, verbose, **options.parse_options())
+    feed_chunks(parser, iter_html_chunks(source, options.chunk_size, options.cache,
+                                         options.verbose, options.prescan, stats), stats)
+    return parser.table_count
+
+
+def list_tables(source, options=None, stats=None):
+    """
+    Return a TableSummary for every table of the source that --select,
+    --max-tables and --table keep, without collecting any cell text.
+    """
+    options = options or ExtractOptions()
+    parser = TableSummaryParser(options.select, options.max_tables, options.table_index)
+    chunks = iter_html_chunks(source, options.chunk_size, options.cache, options.verbose,
+                              options.prescan, stats)
+    try:
+        feed_chunks(parser, iter_table_tag_chunks(chunks), stats)
+    finally:
+        _close_chunks(chunks)
+    return parser.summaries
+
+
+def _timed_tables(engine, html, stats):
+    """
+    engine.parse(html), charging the time the engine spends producing
+    tables and rows to "parse" (eager engines do all of it in parse()).
+    """
+    with stats.phase("parse"):
+        tables = iter(engine.parse(html))
+    while True:
+        with stats.phase("parse"):
+            table = next(tables, None)
+        if table is None:
+            return
+        stats.counters["tables"] += 1
+        yield _timed_rows(table, stats)
+
+
+def _timed_rows(table, stats):
+    rows = iter(table)
+    while True:
+        with stats.phase("parse"):
+            row = next(rows, None)
+        if row is None:
+            return
+        stats.counters["rows"] += 1
+        stats.counters["cells"] += len(row)
+        yield row
+
+
+def extract_source(source, out_dir="", options=None, verbose=True, stats=None):
+    """
+    Write every table of one source to out_dir/table_N.csv, printing the
+    file names when verbose. Returns the number of tables written.
+    stats, if given, is a Stats that the run is recorded in.
+    """
+    options = options or ExtractOptions()
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    entry = options.manifest_entry(source, out_dir)
+    if entry is not None:
+        # The whole body is needed for its hash before anything is parsed.
+        html = load_html(source, options.cache, options.verbose, options.prescan, stats)
+        return extract_html(html, out_dir, verbose, options.engine, stats, options.parse_options(),
+                            manifest=entry)
+    revisions = options.revision_entry(source)
+    if revisions is not None:
+        html = iter_html_chunks(source, options.chunk_size, options.cache,
+                                options.verbose, options.prescan, stats)
+        return extract_html(html, out_dir, verbose, options.engine, stats, options.parse_options(),
+                            revisions=revisions)
+    if options.stream or options.pipeline:
+        if not options.sinks:
+            return stream_tables_to_csv(source, out_dir, options, verbose, stats)
+    if options.sinks or options.engine != DEFAULT_ENGINE or options.stops_early():
+        # Parse as the page arrives, so reading can stop after the wanted tables.
+        html = iter_html_chunks(source, options.chunk_size, options.cache,
+                                options.verbose, options.prescan, stats)
+    else:
+        html = load_html(source, options.cache, options.verbose, options.prescan, stats)
+    return extract_html(html, out_dir, verbose, options.engine, stats, options.parse_options(),
+                        options.sinks)
+
+
+def extract_source_stats(source, out_dir="", options=None, verbose=True):
+    """extract_source() with a fresh Stats; returns (tables written, stats.as_dict())."""
+    stats = Stats()
+    count = extract_source(source, out_dir, options, verbose, stats)
+    return count, stats.as_dict()
+
+
+def extract_html(html_text, out_dir="", verbose=True, engine=DEFAULT_ENGINE, stats=None,
+                 parse_options=None, sinks=None, manifest=None, revisions=None):
+    """
+    Write every table of an HTML document (a str or an iterable of str
+    chunks) to out_dir/table_N.csv, or to the --sink specs in sinks, all
+    from the one parse. With manifest (a ManifestEntry; html_text must be
+    a str) an unchanged page or table is not written again. With
+    revisions (a RevisionEntry) every table is recorded in the revision
+    store, and with its delta flag only the changed rows are written.
+    Returns the number of tables written.
+    """
+    parse_options = parse_options or {}
+    start = parse_options.get("table_index") or 0
+    if manifest is not None:
+        return _extract_incremental(html_text, out_dir, verbose, engine, stats, parse_options, manifest)
+    if revisions is not None:
+        return _extract_revisions(html_text, out_dir, verbose, engine, stats, parse_options, revisions)
+    if sinks:
+        return _extract_to_sinks(html_text, open_sinks(sinks, out_dir, verbose), engine, stats,
+                                 parse_options)
+    try:
+        return write_tables_to_csv(parse_tables(html_text, engine, stats, parse_options), out_dir,
+                                   verbose, stats, start)
+    finally:
+        _close_chunks(html_text)
+
+
+def _extract_to_sinks(html_text, sinks, engine, stats, parse_options):
+    chunks = [html_text] if isinstance(html_text, str) else html_text
+    try:
+        if engine != DEFAULT_ENGINE:
+            tables = parse_tables(chunks, engine, stats, parse_options)
+            return write_tables_to_sinks(tables, sinks, parse_options.get("table_index") or 0, stats)
+        if stats is None:
+            parser = SinkParser(sinks, **parse_options)
+        else:
+            parser = instrumented(SinkParser, stats, sinks, **parse_options)
+        feed_chunks(parser, chunks, stats)
+        return parser.table_count
+    finally:
+        _close_chunks(chunks)
+        close_sinks(sinks, stats)
+
+
+def extract_body(body, charset, out_dir="", verbose=True, engine=DEFAULT_ENGINE, stats=False,
+                 parse_options=None, sinks=None, manifest=None, revisions=None, network=None):
+    """
+    extract_html() for a fetched response body that is still in bytes.
+    With stats, returns (tables written, Stats.as_dict()) instead of the count;
+    network, the (wall, cpu, bytes on the wire) of the download from
+    ConcurrentFetcher.fetch_all(), is then recorded as the "network" phase.
+    """
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    if not stats:
+        return extract_html(body.decode(charset, errors="replace"), out_dir, verbose, engine,
+                            parse_options=parse_options, sinks=sinks, manifest=manifest,
+                            revisions=revisions)
+    stats = Stats()
+    if network is not None:
+        stats.wall["network"] += network[0]
+        stats.cpu["network"] += network[1]
+        stats.counters["bytes_on_wire"] += network[2]
+    stats.counters["bytes_read"] += len(body)
+    with stats.phase("decode"):
+        html_text = body.decode(charset, errors="replace")
+    return (extract_html(html_text, out_dir, verbose, engine, stats, parse_options, sinks, manifest,
+                         revisions),
+            stats.as_dict())
+
+
+def source_dir_name(index, source):
+    """
+    Output directory name for source number index of a batch, e.g.
+    "0003_Comparison_of_programming_languages". The index keeps names
+    unique and in input order even when two sources share a base name.
+    """
+    parsed = urlparse(source)
+    if parsed.scheme in ("http", "https"):
+        name = os.path.splitext(parsed.path.rstrip("/").rsplit("/", 1)[-1])[0] or parsed.netloc
+    else:
+        name = os.path.splitext(os.path.basename(source))[0]
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._") or "source"
+    return f"{index:04d}_{name}"
+
+
+def read_source_list(path):
+    """Read one source per line from a file, or from stdin when path is "-"."""
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        lines = [line.strip() for line in f]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def _batch_worker(func, *args):
+    """
+    Run func(*args) in a batch worker process. Exceptions are raised
+    again as a RuntimeError with the original message, because some
+    (an HTTPError holds its open response) cannot be pickled back.
+    """
+    try:
+        return func(*args)
+    except Exception as e:
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+def run_batch(sources, out_dir=".", jobs=None, options=None, fetch_workers=None, per_host=4,
+              stats=None):
+    """
+    Extract many sources in parallel, one worker process per core by default.
+
+    With fetch_workers, URLs are downloaded by a ConcurrentFetcher in this
+    process and only their bodies are sent to the worker processes; at most
+    2 * jobs bodies wait for a parser at any time.
+    Results are reported in input order. Returns the number of failed sources.
+    With stats, the Stats of every worker are added to it; the phase times
+    are then CPU-seconds summed over the workers, not elapsed time.
+    """
+    options = options or ExtractOptions()
+    jobs = jobs or os.cpu_count() or 1
+    dirs = [os.path.join(out_dir, source_dir_name(i, src)) for i, src in enumerate(sources)]
+    prefetch = [i for i, src in enumerate(sources)
+                if fetch_workers and urlparse(src).scheme in ("http", "https")]
+    futures = [None] * len(sources)
+    failures = 0
+    with ProcessPoolExecutor(max_workers=min(jobs, len(sources))) as pool:
+        for i, (src, d) in enumerate(zip(sources, dirs)):
+            if not (fetch_workers and urlparse(src).scheme in ("http", "https")):
+                worker = extract_source if stats is None else extract_source_stats
+                futures[i] = pool.submit(_batch_worker, worker, src, d, options, False)
+        if prefetch:
+            fetcher = ConcurrentFetcher(fetch_workers, per_host, cache=options.cache,
+                                        verbose=options.verbose)
+            try:
+                fetched = fetcher.fetch_all([sources[i] for i in prefetch])
+                for j, _, result, error in fetched:
+                    i = prefetch[j]
+                    if error is not None:
+                        futures[i] = error
+                        continue
+                    body, charset, network = result
+                    futures[i] = pool.submit(_batch_worker, extract_body, body, charset, dirs[i], False,
+                                             options.engine, stats is not None, options.parse_options(),
+                                             options.sinks, options.manifest_entry(sources[i], dirs[i]),
+                                             options.revision_entry(sources[i]), network)
+                    pending = [f for f in futures if f is not None
+                               and not isinstance(f, Exception) and not f.done()]
+                    if len(pending) >= 2 * jobs:
+                        wait(pending, return_when=FIRST_COMPLETED)
+            finally:
+                fetcher.close()
+        for src, d, future in zip(sources, dirs, futures):
+            try:
+                if isinstance(future, Exception):
+                    raise future
+                count = future.result()
+                if stats is not None:
+                    count, worker_stats = count
+                    stats.merge(worker_stats)
+            except Exception as e:
+                failures += 1
+                print(f"FAILED {src}: {e}", file=sys.stderr)
+            else:
+                print(f"Wrote {count} table(s) from {src} to {d}")
+    return failures
+
+
+def columns_arg(text):
+    """argparse type for --columns."""
+    try:
+        return parse_columns(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def where_arg(text):
+    """argparse type for --where."""
+    try:
+        return RowFilter(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def sink_arg(text):
+    """argparse type for --sink."""
+    try:
+        return parse_sink(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def select_arg(text):
+    """argparse type for --select."""
+    try:
+        return TableSelector(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(
+        usage="python read_html_table.py [options] <URL|FILENAME> [<URL|FILENAME> ...]",
+        description="Write every HTML <table> of a page to table_N.csv files.",
+    )
+    ap.add_argument("sources", nargs="*", metavar="source",
+                    help="URL (http/https) or local HTML file")
+    ap.add_argument("--sources-from", metavar="FILE",
+                    help='read further sources from FILE, one per line ("-" for stdin)')
+    ap.add_argument("--jobs", "-j", type=int, default=None,
+                    help="worker processes for batch extraction (default: number of cores)")
+    ap.add_argument("--fetch-workers", type=int, default=None,
+                    help="batch mode: download URLs with N threads over keep-alive connections")
+    ap.add_argument("--per-host", type=int, default=None,
+                    help="with --fetch-workers: concurrent requests per host (default: 4)")
+    ap.add_argument("--cache-dir", default=None,
+                    help="keep downloaded pages in DIR and revalidate them with conditional GETs")
+    ap.add_argument("--cache-max-mb", type=float, default=DEFAULT_CACHE_MAX_BYTES / (1024 * 1024),
+                    help="evict least recently used pages beyond this size (default: %(default)d)")
+    ap.add_argument("--cache-ttl", type=float, default=0,
+                    help="seconds a cached page is used without revalidation (default: 0)")
+    ap.add_argument("-v", "--verbose", action="store_true",
+                    help="report bytes on the wire and decoded bytes of every download")
+    ap.add_argument("--out-dir", default=None,
+                    help="directory for the CSV files (batch default: current directory)")
+    ap.add_argument("--stream", action="store_true",
+                    help="parse in chunks and write rows as soon as they are complete")
+    ap.add_argument("--pipeline", action="store_true",
+                    help="like --stream, but a background thread writes the rows in batches "
+                         "while parsing goes on")
+    ap.add_argument("--sink", type=sink_arg, action="append", default=None, metavar="KIND[:PATH]",
+                    help="write the rows to this output; repeat for several, all filled from one "
+                         "parse: csv[:DIR], jsonl[:FILE] (default tables.jsonl), "
+                         "sqlite[:FILE] (default tables.db); paths are inside --out-dir")
+    ap.add_argument("--manifest", default=None, metavar="FILE",
+                    help="SQLite file of body and table hashes: skip sources whose page is "
+                         "unchanged and rewrite only the tables that changed")
+    ap.add_argument("--revisions", default=None, metavar="FILE",
+                    help="SQLite history of every table: a base snapshot plus the rows added, "
+                         "removed or changed by each later run")
+    ap.add_argument("--delta", action="store_true",
+                    help="with --revisions: write only the rows that changed since the last run, "
+                         "to table_N.delta.csv")
+    ap.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                    help=f"bytes read per chunk in --stream mode (default: {DEFAULT_CHUNK_SIZE})")
+    ap.add_argument("--prescan", action="store_true",
+                    help="local files: mmap the file and parse only its <table> regions")
+    ap.add_argument("--expand-spans", action="store_true",
+                    help="repeat rowspan/colspan cells in every row and column they cover")
+    ap.add_argument("--columns", type=columns_arg, default=None, metavar="COL,COL,...",
+                    help="keep only these columns, by header name or 0-based index "
+                         "(e.g. --columns Language,Imperative,3)")
+    ap.add_argument("--where", type=where_arg, default=None, metavar="EXPR",
+                    help='keep only rows matching EXPR, e.g. "Imperative == Yes and Standardized != No"')
+    ap.add_argument("--select", type=select_arg, default=None, metavar="SELECTOR",
+                    help='extract only matching tables, e.g. "table.wikitable", "#id" or '
+                         '"caption~=language"')
+    limit = ap.add_mutually_exclusive_group()
+    limit.add_argument("--max-tables", type=int, default=None, metavar="N",
+                       help="extract only the first N tables and stop reading the page after them")
+    limit.add_argument("--table", type=int, default=None, metavar="INDEX", dest="table_index",
+                       help="extract only table INDEX (0-based, written as table_INDEX.csv) "
+                            "and stop reading the page after it")
+    ap.add_argument("--engine", default=DEFAULT_ENGINE,
+                    help=f"table extractor to use (default: {DEFAULT_ENGINE}; see --list-engines)")
+    ap.add_argument("--stats", nargs="?", const="text", choices=STATS_FORMATS, default=None,
+                    metavar="FORMAT",
+                    help="print time per phase and counters to stderr, as text (default) "
+                         "or --stats=json")
+    ap.add_argument("--list", action="store_true",
+                    help="only list the tables (rows, columns, cells, class, id, caption); "
+                         "no cell text is collected")
+    ap.add_argument("--list-engines", action="store_true",
+                    help="list the available table extractors and exit")
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # A bare --stats must not take the source after it for its format.
+    argv = [f"--stats={STATS_FORMATS[0]}"
+            if arg == "--stats" and (i + 1 == len(argv) or argv[i + 1] not in STATS_FORMATS) else arg
+            for i, arg in enumerate(argv)]
+    args = ap.parse_args(argv)
+    if args.list_engines:
+        for engine in list_engines():
+            print(f"{engine.name:22} {engine.description}")
+        sys.exit(0)
+    try:
+        get_engine(args.engine)
+    except ValueError as e:
+        ap.error(str(e))
+    for flag in ("stream", "pipeline"):
+        if getattr(args, flag) and args.engine != DEFAULT_ENGINE:
+            ap.error(f"--{flag} is only supported by the {DEFAULT_ENGINE} engine")
+    for flag in ("expand_spans", "columns", "where", "select"):
+        if getattr(args, flag) and args.engine != DEFAULT_ENGINE:
+            ap.error(f"--{flag.replace('_', '-')} is only supported by the {DEFAULT_ENGINE} engine")
+    if args.list:
+        for flag in ("stream", "pipeline", "sink", "expand_spans", "columns", "where"):
+            if getattr(args, flag):
+                ap.error(f"--list cannot be combined with --{flag.replace('_', '-')}")
+        if args.engine != DEFAULT_ENGINE:
+            ap.error(f"--list is only supported by the {DEFAULT_ENGINE} engine")
+    if args.sink and args.pipeline:
+        ap.error("--pipeline cannot be combined with --sink")
+    if args.manifest:
+        for flag in ("stream", "pipeline", "sink", "list"):
+            if getattr(args, flag):
+                ap.error(f"--manifest cannot be combined with --{flag}")
+    if args.revisions:
+        for flag in ("stream", "pipeline", "sink", "manifest", "list"):
+            if getattr(args, flag):
+                ap.error(f"--revisions cannot be combined with --{flag}")
+    elif args.delta:
+        ap.error("--delta needs --revisions")
+    if args.max_tables is not None and args.max_tables < 1:
+        ap.error("--max-tables must be at least 1")
+    if args.table_index is not None and args.table_index < 0:
+        ap.error("--table must be 0 or more")
+    if args.sources_from:
+        args.sources.extend(read_source_list(args.sources_from))
+    if not args.sources:
+        ap.error("no <URL|FILENAME> given")
+    if args.per_host is not None and not args.fetch_workers:
+        ap.error("--per-host needs --fetch-workers")
+    if args.fetch_workers and len(args.sources) == 1 and not args.sources_from:
+        ap.error("--fetch-workers only applies to a batch of several sources")
+    if args.per_host is None:
+        args.per_host = 4
+    if args.sink and len(args.sources) > 1 and any(path and os.path.isabs(path) for _, path in args.sink):
+        ap.error("with several sources --sink paths must be relative: each source writes inside "
+                 "its own directory")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache = None
+    if args.cache_dir:
+        cache = HTTPCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024), args.cache_ttl)
+    options = ExtractOptions(args.stream, args.chunk_size, cache, args.verbose, args.prescan,
+                             args.engine, args.expand_spans, args.columns, args.where,
+                             args.max_tables, args.table_index, args.select, args.pipeline,
+                             args.sink, args.manifest, args.revisions, args.delta)
+
+    stats = Stats() if args.stats else None
+
+    if args.list:
+        for source in args.sources:
+            if len(args.sources) > 1:
+                print(f"{source}:")
+            for summary in list_tables(source, options, stats):
+                print(summary.describe())
+        print_stats(stats, args.stats)
+        return
+
+    if len(args.sources) > 1 or args.sources_from:
+        failures = run_batch(args.sources, args.out_dir or ".", args.jobs, options,
+                             args.fetch_workers, args.per_host, stats)
+        print_stats(stats, args.stats)
+        sys.exit(1 if failures else 0)
+
+    if not extract_source(args.sources[0], args.out_dir or "", options, stats=stats):
+        print("No <table> elements found.")
+    print_stats(stats, args.stats)
+
+
+def print_stats(stats, fmt):
+    """Print a Stats to stderr as a table ("text") or as JSON ("json")."""
+    if stats is None:
+        return
+    if fmt == "json":
+        print(json.dumps(stats.as_dict(), indent=2), file=sys.stderr)
+    else:
+        print(stats.format(), file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+serve_html_table.py
+
+Usage:
+    python serve_html_table.py [--host HOST] [--port N] [--workers N]
+                               [--max-body-mb MB] [--timeout S] [--quiet]
+
+Runs read_html_table.py as a long-lived HTTP server, so that extracting
+the tables of a small page does not pay for starting an interpreter and
+importing the modules every time. The worker processes are started and
+warmed up (a first page parsed) before the server accepts requests.
+
+    POST /extract          the request body is the HTML page (charset from
+                           the Content-Type header, default UTF-8)
+    GET  /extract?url=URL  the server downloads an http/https page
+    GET  /health           "ok"
+
+Query parameters of /extract:
+    format=json           {"tables": [[[cell, ...], ...], ...]} (default)
+    format=csv            one table as CSV: table 0, or the one given by table=
+    table=INDEX           only this table (parsing stops after it)
+    max_tables=N          only the first N tables
+    select, columns, where, expand_spans=1, engine
+                          as the read_html_table.py options of the same name
+
+Each request is handled by its own thread; parsing runs in a pool of
+--workers processes (0 parses in the request thread). Bodies larger
+than --max-body-mb are refused with 413, as are downloaded pages once
+their decoded text passes that size. Bad parameters and a Content-Type
+charset that Python does not know get 400, failed downloads 502.
+Errors are returned as {"error": message}.
+
+--timeout also bounds the downloads of GET /extract?url=: 80% of it is
+the socket timeout of the connection and the longest a whole download
+may take, so a slow or silent origin frees its worker and gets 502. A
+request that waits longer than --timeout for its worker gets 504. The
+worker of a posted page that is still parsing by then cannot be
+interrupted and stays busy until the parse ends; --max-body-mb is what
+bounds that.
+
+bench_serve_html_table.py measures the latency of a running server.
+
+Only Python standard libraries are used (no external packages).
+"""
+
+import argparse
+import codecs
+import csv
+import io
+import json
+import os
+import sys
+import time
+import urllib.error
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from read_html_table import (DEFAULT_ENGINE, RowFilter, TableSelector, get_engine, iter_html_chunks,
+                             parse_columns, parse_tables)
+
+
+DEFAULT_PORT = 8350
+DEFAULT_MAX_BODY_BYTES = 16 * 1024 * 1024
+DEFAULT_TIMEOUT = 30
+DOWNLOAD_SHARE = 0.8   # of --timeout a download may take, so that it fails (502) before the 504
+WARM_UP_PAGE = b"<table><caption>warm</caption><tr><th>a</th></tr><tr><td>1</td></tr></table>"
+
+
+class RequestTooLarge(Exception):
+    """The posted body or the downloaded page is over the size limit."""
+
+
+def request_parse_options(query):
+    """
+    (engine, parse_options) for the parameters of an /extract request
+    ({name: value}); raises ValueError for a bad value.
+    """
+    def number(name, minimum):
+        if name not in query:
+            return None
+        try:
+            value = int(query[name])
+        except ValueError:
+            raise ValueError(f"{name} must be an integer") from None
+        if value < minimum:
+            raise ValueError(f"{name} must be at least {minimum}")
+        return value
+
+    engine = query.get("engine", DEFAULT_ENGINE)
+    get_engine(engine)
+    options = {
+        "expand_spans": query.get("expand_spans", "") in ("1", "true", "yes"),
+        "columns": parse_columns(query["columns"]) if "columns" in query else None,
+        "where": RowFilter(query["where"]) if "where" in query else None,
+        "select": TableSelector(query["select"]) if "select" in query else None,
+        "max_tables": number("max_tables", 1),
+        "table_index": number("table", 0),
+    }
+    if engine != DEFAULT_ENGINE:
+        for name in ("expand_spans", "columns", "where", "select"):
+            if options[name]:
+                raise ValueError(f"{name} is only supported by the {DEFAULT_ENGINE} engine")
+    return engine, options
+
+
+def limited_chunks(chunks, max_chars, deadline=None):
+    """
+    Pass the chunks of a download through, raising RequestTooLarge past
+    max_chars and TimeoutError once time.monotonic() passes deadline.
+    """
+    seen = 0
+    for chunk in chunks:
+        seen += len(chunk)
+        if seen > max_chars:
+            raise RequestTooLarge(f"page is larger than {max_chars} bytes")
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError("download took too long")
+        yield chunk
+
+
+def extract_tables(body=None, charset="utf-8", url=None, query=None, max_bytes=DEFAULT_MAX_BODY_BYTES,
+                   timeout=DEFAULT_TIMEOUT):
+    """
+    Worker side of /extract: the tables of a posted body (bytes) or of a
+    downloaded url, as lists of rows, for the request parameters in query.
+    A download is given up after timeout seconds in all, or when the
+    server is silent that long; it then raises URLError, like any other
+    failed download.
+    """
+    engine, parse_options = request_parse_options(query or {})
+    if url is None:
+        return [list(table) for table in
+                parse_tables(body.decode(charset, errors="replace"), engine, None, parse_options)]
+    deadline = time.monotonic() + timeout
+    try:
+        chunks = iter_html_chunks(url, timeout=timeout)
+        try:
+            return [list(table) for table in
+                    parse_tables(limited_chunks(chunks, max_bytes, deadline), engine, None,
+                                 parse_options)]
+        finally:
+            chunks.close()
+    except TimeoutError:
+        raise urllib.error.URLError(f"timed out after {timeout:g} s") from None
+
+
+class ExtractionServer(ThreadingHTTPServer):
+    """
+    ThreadingHTTPServer that hands the parsing of every request to a pool
+    of warm worker processes (or does it in the request thread with
+    workers=0).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, workers=None, max_body_bytes=DEFAULT_MAX_BODY_BYTES,
+                 timeout=DEFAULT_TIMEOUT, quiet=False):
+        super().__init__(address, ExtractionHandler)
+        self.max_body_bytes = max_body_bytes
+        self.timeout = timeout
+        self.quiet = quiet
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(workers) if workers else None
+        if self.pool is not None:
+            # Start every process and import the parser before the first request.
+            warm = [self.pool.submit(extract_tables, WARM_UP_PAGE) for _ in range(workers)]
+            for future in warm:
+                future.result()
+
+    def extract(self, **kwargs):
+        kwargs["max_bytes"] = self.max_body_bytes
+        kwargs["timeout"] = self.timeout * DOWNLOAD_SHARE
+        if self.pool is None:
+            return extract_tables(**kwargs)
+        return self.pool.submit(extract_tables, **kwargs).result(self.timeout)
+
+    def server_close(self):
+        super().server_close()
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+
+class ExtractionHandler(BaseHTTPRequestHandler):
+    """The /extract and /health endpoints; connections are kept alive."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "serve_html_table/1.0"
+
+    def do_GET(self):
+        path, query = self._parse_path()
+        if path == "/health":
+            self._send(200, b"ok\n", "text/plain; charset=utf-8")
+        elif path != "/extract":
+            self._error(404, f"no such endpoint: {path}")
+        elif "url" not in query:
+            self._error(400, "GET /extract needs url=; POST the page to extract it directly")
+        elif urlparse(query["url"]).scheme not in ("http", "https"):
+            self._error(400, "url must be http or https")
+        else:
+            self._extract(query, url=query["url"])
+
+    def do_POST(self):
+        path, query = self._parse_path()
+        length = self.headers.get("Content-Length")
+        # A refused request's body is never read, so its connection cannot be reused.
+        if path != "/extract":
+            self.close_connection = True
+            self._error(404, f"no such endpoint: {path}")
+            return
+        if length is None or not length.isdigit():
+            self.close_connection = True
+            self._error(411, "Content-Length is required")
+            return
+        if int(length) > self.server.max_body_bytes:
+            self.close_connection = True
+            self._error(413, f"body is larger than {self.server.max_body_bytes} bytes")
+            return
+        body = self.rfile.read(int(length))
+        charset = self.headers.get_content_charset("utf-8")
+        try:
+            codecs.lookup(charset)
+        except LookupError:
+            self._error(400, f"unknown charset: {charset}")
+            return
+        self._extract(query, body=body, charset=charset)
+
+    def _parse_path(self):
+        parts = urlparse(self.path)
+        return parts.path, {name: values[-1] for name, values in parse_qs(parts.query).items()}
+
+    def _extract(self, query, **source):
+        fmt = query.pop("format", "json")
+        if fmt not in ("json", "csv"):
+            self._error(400, "format must be json or csv")
+            return
+        try:
+            tables = self.server.extract(query=query, **source)
+        except RequestTooLarge as e:
+            self._error(413, str(e))
+            return
+        except ValueError as e:
+            self._error(400, str(e))
+            return
+        except TimeoutError:
+            self._error(504, f"extraction took longer than {self.server.timeout:g} s")
+            return
+        except OSError as e:
+            self._error(502, f"cannot download {source.get('url')}: {e}")
+            return
+        except Exception as e:
+            self._error(500, f"{type(e).__name__}: {e}")
+            return
+        if fmt == "json":
+            self._send(200, json.dumps({"tables": tables}, ensure_ascii=False).encode("utf-8"),
+                       "application/json")
+        elif not tables:
+            self._error(404, "no matching <table> found")
+        else:
+            out = io.StringIO()
+            csv.writer(out).writerows(tables[0])
+            self._send(200, out.getvalue().encode("utf-8"), "text/csv; charset=utf-8")
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _error(self, status, message):
+        self._send(status, json.dumps({"error": message}).encode("utf-8"), "application/json")
+
+    def _send(self, status, data, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Serve read_html_table.py extraction over HTTP.")
+    ap.add_argument("--host", default="127.0.0.1", help="address to listen on (default: %(default)s)")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT, help="port (default: %(default)s)")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="parsing processes (default: number of cores; 0 parses in the request thread)")
+    ap.add_argument("--max-body-mb", type=float, default=DEFAULT_MAX_BODY_BYTES / (1024 * 1024),
+                    help="largest posted body or downloaded page (default: %(default)g)")
+    ap.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                    help="seconds a request may wait for its worker; downloads get 80%% of it "
+                         "(default: %(default)g)")
+    ap.add_argument("--quiet", action="store_true", help="do not log every request to stderr")
+    args = ap.parse_args(argv)
+    if args.workers is not None and args.workers < 0:
+        ap.error("--workers must be 0 or more")
+
+    server = ExtractionServer((args.host, args.port), args.workers,
+                              int(args.max_body_mb * 1024 * 1024), args.timeout, args.quiet)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}/extract", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+table_engines.py
+
+The table extractors written for project02 across this repository, behind
+the engine interface used by read_html_table.py --engine:
+
+    engine.name          registry key
+    engine.description   one-line summary of the strategy
+    engine.parse(html)   html is a str or an iterable of str chunks;
+                         returns an iterable of tables, each a list of
+                         rows, each a list of cell strings
+
+Extractors that can be imported as they are (no side effects on import,
+standard library only) are loaded from their project folders. The others
+are ported here unchanged in strategy:
+    karl_agli        the submitted file does not compile
+    sidney_green     the script downloads a page when imported
+    aditya_poudel    the script imports pandas, only used for CSV writing
+
+read_html_table.py calls register_all() the first time an engine other
+than its built-in one is requested. This module does not import
+read_html_table.py, so it works whether that file runs as a script or
+is imported.
+
+Only Python standard libraries are used (no external packages).
+"""
+
+import importlib.util
+import os
+import re
+import sys
+from html.parser import HTMLParser
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+_modules = {}
+
+
+def load_project_module(relpath):
+    """Import a student script by path, e.g. "sharif_jenkins/project02/extract_tables.py"."""
+    if relpath not in _modules:
+        name = "_engine_" + re.sub(r"\W", "_", relpath)
+        spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relpath))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _modules[relpath] = module
+    return _modules[relpath]
+
+
+def as_text(html):
+    """Join an iterable of chunks into one string (engines that need the whole page)."""
+    return html if isinstance(html, str) else "".join(html)
+
+
+def feed_all(parser, html):
+    """Feed a str or an iterable of chunks to an HTMLParser and close it."""
+    for chunk in ([html] if isinstance(html, str) else html):
+        parser.feed(chunk)
+    parser.close()
+    return parser
+
+
+class HTMLParserSubclassEngine:
+    """Engine for an HTMLParser subclass that leaves its tables in .tables."""
+
+    def __init__(self, name, relpath, class_name, description, convert=None):
+        self.name = name
+        self.relpath = relpath
+        self.class_name = class_name
+        self.description = description
+        self.convert = convert
+
+    def parse(self, html):
+        parser_class = getattr(load_project_module(self.relpath), self.class_name)
+        tables = feed_all(parser_class(), html).tables
+        return [self.convert(t) for t in tables] if self.convert else tables
+
+
+def _jamal_table_rows(table):
+    # jamal_goodman keeps a CompactTable: flat cell texts plus row offsets
+    return list(table.rows())
+
+
+class CharStackEngine:
+    """ositadinma_odunze: walks the page one character at a time with a tag stack."""
+
+    name = "ositadinma-charstack"
+    description = ("ositadinma_odunze: character-by-character scan with a tag stack; "
+                   "rows of all tables come back as a single table")
+
+    def parse(self, html):
+        module = load_project_module("ositadinma_odunze/project02/read_html_table.py")
+        rows = module.parse_table(as_text(html))
+        return [rows] if rows else []
+
+
+class FindScannerEngine:
+    """
+    karl_agli: locates <table>, <tr> and <td>/<th> with str.find on a
+    lower-cased copy of the page, then strips tags character by character.
+    """
+
+    name = "karl-find"
+    description = "karl_agli: str.find scanner over a lower-cased copy of the page"
+
+    def parse(self, html):
+        html = as_text(html)
+        return [self._parse_table(t) for t in self._find_tables(html)]
+
+    @staticmethod
+    def _find_tables(html):
+        tables = []
+        html_lower = html.lower()
+        pos = 0
+        while True:
+            start = html_lower.find('<table', pos)
+            if start == -1:
+                break
+            end = html_lower.find('</table>', start)
+            if end == -1:
+                break
+            tables.append(html[start:end + 8])
+            pos = end + 8
+        return tables
+
+    def _parse_table(self, table_html):
+        rows = []
+        table_lower = table_html.lower()
+        pos = 0
+        while True:
+            tr_start = table_lower.find('<tr', pos)
+            if tr_start == -1:
+                break
+            tr_end = table_lower.find('</tr>', tr_start)
+            if tr_end == -1:
+                break
+            cells = self._parse_row(table_html[tr_start:tr_end + 5])
+            if cells:
+                rows.append(cells)
+            pos = tr_end + 5
+        return rows
+
+    def _parse_row(self, row_html):
+        cells = []
+        row_lower = row_html.lower()
+        pos = 0
+        while True:
+            td_pos = row_lower.find('<td', pos)
+            th_pos = row_lower.find('<th', pos)
+            if td_pos == -1 and th_pos == -1:
+                break
+            if td_pos == -1 or (th_pos != -1 and th_pos < td_pos):
+                cell_start, cell_tag = th_pos, 'th'
+            else:
+                cell_start, cell_tag = td_pos, 'td'
+            tag_end = row_lower.find('>', cell_start)
+            if tag_end == -1:
+                break
+            close_tag = '</' + cell_tag + '>'
+            cell_end = row_lower.find(close_tag, tag_end)
+            if cell_end == -1:
+                break
+            cells.append(self._clean_html(row_html[tag_end + 1:cell_end]))
+            pos = cell_end + len(close_tag)
+        return cells
+
+    @staticmethod
+    def _clean_html(text):
+        clean = ''
+        in_tag = False
+        for char in text:
+            if char == '<':
+                in_tag = True
+            elif char == '>':
+                in_tag = False
+            elif not in_tag:
+                clean += char
+        clean = ' '.join(clean.split())
+        clean = clean.replace('&nbsp;', ' ')
+        clean = clean.replace('&amp;', '&')
+        clean = clean.replace('&lt;', '<')
+        clean = clean.replace('&gt;', '>')
+        clean = clean.replace('&quot;', '"')
+        clean = clean.replace('&#39;', "'")
+        return clean.strip()
+
+
+class RegexEngine:
+    """
+    sidney_green: re.findall for tables, then rows, then cells, and a regex
+    to strip the remaining tags. The original keeps only the largest table;
+    the engine returns all of them.
+    """
+
+    name = "sidney-regex"
+    description = "sidney_green: nested re.findall over tables, rows and cells"
+
+    TABLE_RE = re.compile(r'<table.*?>(.*?)</table>', re.DOTALL)
+    ROW_RE = re.compile(r'<tr.*?>(.*?)</tr>', re.DOTALL)
+    CELL_RE = re.compile(r'<t[dh].*?>(.*?)</t[dh]>', re.DOTALL)
+    TAG_RE = re.compile(r'<.*?>')
+
+    def parse(self, html):
+        tables = []
+        for table in self.TABLE_RE.findall(as_text(html)):
+            rows = []
+            for row in self.ROW_RE.findall(table):
+                rows.append([self.TAG_RE.sub('', cell).strip() for cell in self.CELL_RE.findall(row)])
+            tables.append(rows)
+        return tables
+
+
+class _Node:
+    # Simple tree node for HTML structure (aditya_poudel)
+    def __init__(self, tag=None, text=""):
+        self.tag = tag
+        self.text = text
+        self.children = []
+
+
+class _HTMLTreeBuilder(HTMLParser):
+    # Builds a tree of the whole document (aditya_poudel)
+    def __init__(self):
+        super().__init__()
+        self.root = _Node("document")
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        node = _Node(tag)
+        self.stack[-1].children.append(node)
+        self.stack.append(node)
+
+    def handle_endtag(self, tag):
+        if len(self.stack) > 1:
+            self.stack.pop()
+
+    def handle_data(self, data):
+        text = data.strip()
+        if text:
+            self.stack[-1].children.append(_Node(text=text))
+
+
+class DOMTreeEngine:
+    """
+    aditya_poudel: builds a node tree of the whole page, then finds tables
+    with a depth-first search. The original's recursion is kept, with the
+    recursion limit raised for deeply nested (or badly closed) pages.
+    """
+
+    name = "aditya-dom"
+    description = "aditya_poudel: full DOM tree, then depth-first search for tables"
+
+    def parse(self, html):
+        root = feed_all(_HTMLTreeBuilder(), html).root
+        tables = []
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, 100000))
+        try:
+            self._dfs_extract_tables(root, tables)
+        finally:
+            sys.setrecursionlimit(limit)
+        return tables
+
+    def _dfs_extract_tables(self, node, tables):
+        if node.tag == "table":
+            table = []
+            self._collect_rows(node, table)
+            tables.append(table)
+        for child in node.children:
+            self._dfs_extract_tables(child, tables)
+
+    def _collect_rows(self, node, table):
+        for child in node.children:
+            if child.tag == "tr":
+                row = [self._collect_text(c) for c in child.children if c.tag in ("td", "th")]
+                if row:
+                    table.append(row)
+            self._collect_rows(child, table)
+
+    def _collect_text(self, node):
+        text = node.text
+        for child in node.children:
+            text += " " + self._collect_text(child)
+        return text.strip()
+
+
+def register_all(register):
+    """Pass every engine of this module to register(engine)."""
+    register(HTMLParserSubclassEngine(
+        "jamal-htmlparser", "jamal_goodman/project02/table_to_csv.py", "TableHTMLParser",
+        "jamal_goodman: HTMLParser into CompactTable (flat cell texts, row offsets, th bitmap)",
+        _jamal_table_rows))
+    register(HTMLParserSubclassEngine(
+        "sharif-htmlparser", "sharif_jenkins/project02/extract_tables.py", "TableParser",
+        "sharif_jenkins: HTMLParser with entity-preserving cell buffers"))
+    register(HTMLParserSubclassEngine(
+        "nasif-htmlparser", "nasif_ajilore/project02/read_html_table.py", "TableParser",
+        "nasif_ajilore: HTMLParser with string-concatenated cells, skipping script/style"))
+    register(CharStackEngine())
+    register(FindScannerEngine())
+    register(RegexEngine())
+    register(DOMTreeEngine())